@@ -1,8 +1,13 @@
+import queue
+import threading
 import streamlit as st
 import scrap
-from model import RedditPersonaAnalyzer
+from model import FACET_PROMPTS, RedditPersonaAnalyzer
+from instrumentation import configure_logging
 import json 
 
+configure_logging()
+
 API_KEY = st.secrets["api_key"]
 
 st.set_page_config(page_title="Reddit Persona Analyzer", page_icon=":guardsman:", layout="wide")
@@ -10,16 +15,59 @@ st.title("Reddit Persona Analyzer")
 
 st.markdown("This app analyzes a Reddit user's posts and comments to build a persona.")
 
+def load_analyzer(username, progress_box):
+    """Scrape in a worker thread and show posts/comments found so far while it runs."""
+    events = queue.Queue()
+    result = {}
+    analyzer = RedditPersonaAnalyzer(
+        username=username, api_key=API_KEY, on_progress=lambda kind, count: events.put((kind, count))
+    )
+
+    def load():
+        try:
+            analyzer.load()
+        except Exception as e:
+            result["error"] = e
+        finally:
+            events.put(None)
+
+    threading.Thread(target=load, daemon=True).start()
+
+    counts = {"posts": 0, "comments": 0}
+    progress_box.info("Scraping profile...")
+    # Streamlit elements may only be updated from the script thread, so progress is relayed here.
+    while (event := events.get()) is not None:
+        kind, count = event
+        counts[kind] = count
+        progress_box.info(f"Scraping profile... {counts['posts']} posts and {counts['comments']} comments found so far")
+
+    if "error" in result:
+        raise result["error"]
+    return analyzer
+
 username = st.text_area("Enter your Reddit username:",
               placeholder="e.g., example_user")
 if username:
     try:
-        analyzer = RedditPersonaAnalyzer(username=username, api_key=API_KEY) 
-        persona = analyzer.build_persona() 
+        progress_box = st.empty()
+        analyzer = load_analyzer(username, progress_box)
+        progress_box.success(f"Analyzing {analyzer.corpus.stats['items_in']} posts and comments")
+
+        placeholders = {}
+        for facet in FACET_PROMPTS:
+            st.subheader(facet.capitalize())
+            placeholders[facet] = st.empty()
+
+        texts = {facet: "" for facet in FACET_PROMPTS}
+        for facet, chunk in analyzer.stream_persona():
+            texts[facet] += chunk
+            placeholders[facet].markdown("\n".join(f"- {line}" for line in texts[facet].split("\n") if line.strip()))
+
+        persona = {facet: [line.strip() for line in text.strip().split("\n") if line.strip()] for facet, text in texts.items()}
         data = json.dumps(persona, indent=2, ensure_ascii=False) 
-        st.json(data) 
+        with st.expander("Persona JSON"):
+            st.json(data) 
     except Exception as e:
             st.error(f"An error occurred: {e}") 
 else:
     st.warning("Please enter a valid Reddit username.") 
-
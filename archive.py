@@ -0,0 +1,218 @@
+import os
+import json
+import mmap
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARCHIVE_DIR = os.environ.get("REDDIT_ARCHIVE_DIR", "archive")
+
+# Every scrape is archived unless REDDIT_ARCHIVE=0.
+ARCHIVE_ENABLED = os.environ.get("REDDIT_ARCHIVE", "1") != "0"
+
+KINDS = ("posts", "comments")
+
+
+class Archive:
+    """
+    Append-only store of every scrape, so personas can be rebuilt without a browser.
+
+    This is not the same data as history.HistoryStore. The history store keeps
+    one merged, deduplicated row per item ever seen; it is rewritten by every
+    incremental scrape and exists to tell the fetchers where to stop. The
+    archive keeps what each scrape returned, exactly as the analyzer received
+    it, so a persona can be rebuilt from the same input. It also streams in
+    bulk and takes appends from several processes.
+
+    Each snapshot (one user, one kind, one scrape) is written as a single
+    zlib-compressed frame of JSON lines at the end of ``items.z``; a SQLite
+    index maps users to the offset, length and scrape time of their frames.
+    Frames are never rewritten. Both kinds of a scrape are indexed under the
+    same scrape time in one transaction. A snapshot identical to the previous
+    one points at the previous frame instead of storing it again, and an empty
+    listing gets an empty frame. Reads memory-map the data file and decompress
+    one frame at a time, so iterating the whole archive never holds more
+    than a single snapshot in memory.
+    """
+
+    def __init__(self, directory=DEFAULT_ARCHIVE_DIR, level=6):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.level = level
+        self.data_path = os.path.join(directory, "items.z")
+        self._lock = threading.Lock()
+        # isolation_level=None: transactions are explicit, so BEGIN IMMEDIATE can
+        # serialise appends from several processes (batch scrape workers).
+        self._conn = sqlite3.connect(
+            os.path.join(directory, "index.sqlite3"), check_same_thread=False, isolation_level=None, timeout=30
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS snapshots (
+                id INTEGER PRIMARY KEY,
+                username TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                scraped_at REAL NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                items INTEGER NOT NULL,
+                digest TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS snapshots_user ON snapshots (username, kind)")
+        open(self.data_path, "ab").close()
+
+    def append(self, username, kind, items, scraped_at=None):
+        """
+        Archive one scrape of ``kind`` ('posts' or 'comments'); ``items`` may be a
+        list or scrap.main()'s JSON string. Returns the snapshot id.
+        """
+        return self._write(username, {kind: items}, scraped_at)[0]
+
+    def append_user(self, username, posts, comments, scraped_at=None):
+        """Archive both listings of one scrape under the same timestamp; returns their snapshot ids."""
+        return self._write(username, dict(zip(KINDS, (posts, comments))), scraped_at)
+
+    def _write(self, username, listings, scraped_at=None):
+        username = username.strip().lower()
+        scraped_at = scraped_at or time.time()
+        frames = []
+        for kind, items in listings.items():
+            if isinstance(items, str):
+                items = json.loads(items) if items.strip() else []
+            items = items or []
+            raw = "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in items).encode("utf-8")
+            frames.append((kind, len(items), hashlib.sha1(raw).hexdigest(), zlib.compress(raw, self.level) if raw else b""))
+
+        ids = []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for kind, count, digest, frame in frames:
+                    last = self._conn.execute(
+                        "SELECT offset, length, digest FROM snapshots WHERE username = ? AND kind = ? "
+                        "ORDER BY id DESC LIMIT 1",
+                        (username, kind),
+                    ).fetchone()
+                    if last is not None and last[2] == digest:
+                        offset, length = last[:2]
+                    elif frame:
+                        # A crash between the write and the commit only leaves unindexed bytes behind.
+                        with open(self.data_path, "ab") as f:
+                            offset = f.seek(0, os.SEEK_END)
+                            f.write(frame)
+                            f.flush()
+                            os.fsync(f.fileno())
+                        length = len(frame)
+                    else:
+                        offset, length = 0, 0
+                    cursor = self._conn.execute(
+                        "INSERT INTO snapshots (username, kind, scraped_at, offset, length, items, digest) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (username, kind, scraped_at, offset, length, count, digest),
+                    )
+                    ids.append(cursor.lastrowid)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return ids
+
+    def snapshots(self, username=None, kind=None, latest_only=False):
+        """Index rows ``(id, username, kind, scraped_at, offset, length, items)`` in archive order."""
+        query = "SELECT id, username, kind, scraped_at, offset, length, items FROM snapshots"
+        clauses, params = [], []
+        if username is not None:
+            clauses.append("username = ?")
+            params.append(username.strip().lower())
+        if kind is not None:
+            clauses.append("kind = ?")
+            params.append(kind)
+        if latest_only:
+            clauses.append(
+                "id = (SELECT MAX(id) FROM snapshots AS newer "
+                "WHERE newer.username = snapshots.username AND newer.kind = snapshots.kind)"
+            )
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY id"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return rows
+
+    def iter_items(self, username=None, kind=None, latest_only=True):
+        """
+        Stream ``(username, kind, scraped_at, item)`` for every archived item,
+        by default from each user's latest snapshot only.
+        """
+        return self._read(self.snapshots(username, kind, latest_only))
+
+    def latest(self, username):
+        """
+        ``(posts, comments, scraped_at)`` from the user's newest snapshot of each
+        kind, or None if never archived. Kinds archived separately with append()
+        need not share a scrape; ``scraped_at`` is then the newer of the two.
+        """
+        rows = self.snapshots(username, latest_only=True)
+        if not rows:
+            return None
+        listings = {kind: [] for kind in KINDS}
+        for _, kind, _, item in self._read(rows):
+            listings[kind].append(item)
+        return listings["posts"], listings["comments"], max(row[3] for row in rows)
+
+    def _read(self, rows):
+        if not any(row[5] for row in rows):
+            return
+        with open(self.data_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for _, name, snapshot_kind, scraped_at, offset, length, _ in rows:
+                if not length:
+                    continue
+                for line in zlib.decompress(data[offset:offset + length]).splitlines():
+                    yield name, snapshot_kind, scraped_at, json.loads(line)
+
+    def usernames(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT username FROM snapshots ORDER BY username").fetchall()
+        return [row[0] for row in rows]
+
+    def stats(self):
+        with self._lock:
+            snapshots, users, items = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT username), COALESCE(SUM(items), 0) FROM snapshots"
+            ).fetchone()
+        return {"snapshots": snapshots, "users": users, "items": items, "bytes": os.path.getsize(self.data_path)}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_archive = None
+_default_lock = threading.Lock()
+
+
+def get_archive():
+    """Return the process-wide archive."""
+    global _default_archive
+    with _default_lock:
+        if _default_archive is None:
+            _default_archive = Archive()
+        return _default_archive
+
+
+def archive_scrape(username, posts, comments):
+    """Archive a finished scrape if archiving is enabled; never lets a storage error fail the scrape."""
+    if not ARCHIVE_ENABLED or not (posts or comments):
+        return
+    try:
+        get_archive().append_user(username, posts, comments)
+    except Exception as e:
+        logger.warning("Could not archive the scrape of %s: %s", username, e)
@@ -0,0 +1,72 @@
+import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+async def scrape_user(username, fetch, max_posts=20, max_comments=30, executor=None):
+    """
+    Fetch a user's posts and comments at the same time.
+
+    ``fetch(kind, username, limit)`` is a blocking callable (a browser or
+    HTTP backend); each listing runs in its own worker thread so the total
+    latency is the slower of the two instead of their sum.
+    """
+    loop = asyncio.get_running_loop()
+    posts, comments = await asyncio.gather(
+        loop.run_in_executor(executor, fetch, "posts", username, max_posts),
+        loop.run_in_executor(executor, fetch, "comments", username, max_comments),
+    )
+    return posts, comments
+
+
+async def scrape_many(usernames, fetch, max_posts=20, max_comments=30, concurrency=None):
+    """
+    Scrape many users under a global concurrency limit.
+
+    Returns ``{username: (posts, comments)}``; a user whose scrape raised maps
+    to the exception instead so one failure does not sink the batch.
+    Per-host request rates are enforced by the fetch backends themselves.
+    """
+    concurrency = concurrency or os.cpu_count() or 4
+    semaphore = asyncio.Semaphore(concurrency)
+    # Each user occupies two threads, one per listing.
+    executor = ThreadPoolExecutor(max_workers=concurrency * 2, thread_name_prefix="scrape")
+
+    async def run_one(username):
+        async with semaphore:
+            return await scrape_user(username, fetch, max_posts, max_comments, executor)
+
+    try:
+        results = await asyncio.gather(*(run_one(username) for username in usernames), return_exceptions=True)
+    finally:
+        executor.shutdown(wait=False)
+    return dict(zip(usernames, results))
+
+
+def run(coro):
+    """
+    Run ``coro`` to completion from synchronous code.
+
+    Falls back to a helper thread when the caller already has a running
+    event loop (notebooks, async web frameworks), where ``asyncio.run`` fails.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    result = {}
+
+    def target():
+        try:
+            result["value"] = asyncio.run(coro)
+        except BaseException as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=target, name="async-scrape")
+    thread.start()
+    thread.join()
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
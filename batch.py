@@ -0,0 +1,231 @@
+"""
+Offline batch runner: build personas for a file of usernames.
+
+    python batch.py usernames.txt --out personas.jsonl
+
+Scraping fans out over a process pool (each worker has its own browser pool
+and HTTP session, but all of them share one Reddit request budget); persona generation runs on a bounded async pool. A bounded
+queue between the two stages applies backpressure so scraped data never piles
+up faster than the LLM stage can consume it. Results stream to JSONL as they
+complete and finished usernames are checkpointed, so rerunning the same
+command after a crash resumes where it stopped.
+
+With ``--from-archive`` nothing is scraped: each user's latest archived scrape
+is analyzed instead, so personas can be rebuilt at LLM speed after a prompt or
+model change.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+
+def read_usernames(path):
+    """Usernames one per line; blank lines and '#' comments are skipped, duplicates dropped."""
+    seen, usernames = set(), []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            username = line.strip().removeprefix("u/")
+            if username and not username.startswith("#") and username.lower() not in seen:
+                seen.add(username.lower())
+                usernames.append(username)
+    return usernames
+
+
+def read_checkpoint(path):
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        return {line.strip().lower() for line in f if line.strip()}
+
+
+def archive_worker(username):
+    """Read one user's latest archived scrape instead of scraping."""
+    from archive import get_archive
+    snapshot = get_archive().latest(username)
+    if snapshot is None:
+        raise LookupError(f"u/{username} is not in the archive")
+    return snapshot[:2]
+
+
+def shared_rate_limiters():
+    """
+    One process-shared bucket for the Reddit host, with the settings of
+    fetchers.host_limiter. Each worker would otherwise pace itself alone and
+    the batch would send ``scrape_workers`` times REDDIT_REQUESTS_PER_SECOND.
+    """
+    from urllib.parse import urlparse
+    from fetchers import DEFAULT_BASE_URL, host_limiter
+    from ratelimit import SharedRateLimiter
+    return {urlparse(DEFAULT_BASE_URL).netloc: SharedRateLimiter(host_limiter.rate, host_limiter.burst)}
+
+
+def init_scrape_worker(rate_limiters):
+    """
+    Runs once in each worker process. Requests to the hosts in ``rate_limiters``
+    draw from the buckets shared with the other workers. Pool workers leave
+    through os._exit, so atexit handlers (scrap.get_pool's among them) never
+    run there; a multiprocessing finalizer does, and quits the worker's browsers.
+    """
+    from multiprocessing.util import Finalize
+    from fetchers import host_limiter
+    from scrap import close_pool
+    for host, limiter in rate_limiters.items():
+        host_limiter.install(host, limiter)
+    Finalize(None, close_pool, exitpriority=10)
+
+
+def scrape_worker(username, backend, max_posts, max_comments):
+    """Runs in a worker process: scrape one user and return plain lists."""
+    from scrap import fetch_user
+    posts, comments = fetch_user(username, max_posts, max_comments, backend=backend, incremental=True)
+    return posts, comments
+
+
+class BatchRunner:
+    def __init__(self, usernames, out_path, checkpoint_path, api_key, backend="auto", max_posts=20,
+                 max_comments=30, scrape_workers=4, llm_concurrency=8, queue_size=16, from_archive=False):
+        self.usernames = usernames
+        self.out_path = out_path
+        self.checkpoint_path = checkpoint_path
+        self.api_key = api_key
+        self.backend = backend
+        self.max_posts = max_posts
+        self.max_comments = max_comments
+        self.scrape_workers = scrape_workers
+        self.llm_concurrency = llm_concurrency
+        self.queue_size = queue_size
+        self.from_archive = from_archive
+        self.succeeded = 0
+        self.failed = 0
+
+    async def run(self):
+        done = read_checkpoint(self.checkpoint_path)
+        todo = [username for username in self.usernames if username.lower() not in done]
+        print(f"{len(self.usernames)} usernames, {len(self.usernames) - len(todo)} already done, {len(todo)} to go")
+
+        started = time.monotonic()
+        scraped = asyncio.Queue(maxsize=self.queue_size)
+        with open(self.out_path, "a", encoding="utf-8") as out, \
+                open(self.checkpoint_path, "a", encoding="utf-8") as checkpoint, \
+                ProcessPoolExecutor(max_workers=self.scrape_workers, initializer=init_scrape_worker,
+                                    initargs=(shared_rate_limiters(),)) as pool:
+            consumers = [
+                asyncio.create_task(self._analyze(scraped, out, checkpoint))
+                for _ in range(self.llm_concurrency)
+            ]
+            await self._scrape(todo, pool, scraped)
+            for _ in consumers:
+                await scraped.put(None)
+            await asyncio.gather(*consumers)
+
+        elapsed = time.monotonic() - started
+        processed = self.succeeded + self.failed
+        rate = processed / elapsed * 60 if elapsed else 0.0
+        print(f"Processed {processed} users ({self.succeeded} ok, {self.failed} failed) "
+              f"in {elapsed:.1f}s: {rate:.1f} users/min")
+        return {"processed": processed, "succeeded": self.succeeded, "failed": self.failed,
+                "elapsed": elapsed, "users_per_minute": rate}
+
+    async def _scrape(self, usernames, pool, scraped):
+        """Keep at most two scrapes per worker in flight; block on the queue when the LLM stage lags."""
+        loop = asyncio.get_running_loop()
+        in_flight = asyncio.Semaphore(self.scrape_workers * 2)
+
+        async def scrape_one(username):
+            async with in_flight:
+                started = time.monotonic()
+                try:
+                    if self.from_archive:
+                        posts, comments = await asyncio.to_thread(archive_worker, username)
+                    else:
+                        posts, comments = await loop.run_in_executor(
+                            pool, scrape_worker, username, self.backend, self.max_posts, self.max_comments
+                        )
+                    item = (username, posts, comments, None, time.monotonic() - started)
+                except Exception as e:
+                    item = (username, None, None, e, time.monotonic() - started)
+                await scraped.put(item)
+
+        await asyncio.gather(*(scrape_one(username) for username in usernames))
+
+    async def _analyze(self, scraped, out, checkpoint):
+        from model import RedditPersonaAnalyzer
+
+        while (item := await scraped.get()) is not None:
+            username, posts, comments, error, scrape_time = item
+            record = {"username": username, "scrape_seconds": round(scrape_time, 2)}
+            if error is None:
+                try:
+                    started = time.monotonic()
+                    analyzer = RedditPersonaAnalyzer(username, self.api_key, posts=posts, comments=comments)
+                    record["persona"] = await asyncio.to_thread(analyzer.build_persona)
+                    record["llm_seconds"] = round(time.monotonic() - started, 2)
+                    record["posts"] = len(posts)
+                    record["comments"] = len(comments)
+                except Exception as e:
+                    error = e
+            if error is not None:
+                record["error"] = f"{type(error).__name__}: {error}"
+
+            # Single event-loop thread: lines never interleave.
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            if error is None:
+                # Failures are not checkpointed so a rerun retries them.
+                checkpoint.write(username + "\n")
+                checkpoint.flush()
+                self.succeeded += 1
+            else:
+                self.failed += 1
+            print(f"[{self.succeeded + self.failed}] {username}: {'ok' if error is None else record['error']}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build Reddit personas for a list of usernames.")
+    parser.add_argument("usernames", help="file with one username per line")
+    parser.add_argument("--out", default="personas.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("--checkpoint", help="file of finished usernames (default: <out>.done)")
+    parser.add_argument("--api-key", default=os.environ.get("GEMINI_API_KEY"), help="Gemini API key (or GEMINI_API_KEY)")
+    parser.add_argument("--backend", default=os.environ.get("REDDIT_FETCH_BACKEND", "auto"),
+                        choices=["auto", "http", "selenium"])
+    parser.add_argument("--max-posts", type=int, default=20)
+    parser.add_argument("--max-comments", type=int, default=30)
+    parser.add_argument("--scrape-workers", type=int, default=os.cpu_count() or 4, help="scrape processes")
+    parser.add_argument("--llm-concurrency", type=int, default=8, help="persona generations in flight")
+    parser.add_argument("--queue-size", type=int, default=16, help="scraped users buffered for the LLM stage")
+    parser.add_argument("--from-archive", action="store_true", help="analyze archived scrapes instead of scraping")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from instrumentation import configure_logging
+
+    args = parse_args(argv)
+    configure_logging()
+    if not args.api_key:
+        print("A Gemini API key is required (--api-key or GEMINI_API_KEY).")
+        return 2
+
+    runner = BatchRunner(
+        read_usernames(args.usernames),
+        args.out,
+        args.checkpoint or f"{args.out}.done",
+        args.api_key,
+        backend=args.backend,
+        max_posts=args.max_posts,
+        max_comments=args.max_comments,
+        scrape_workers=args.scrape_workers,
+        llm_concurrency=args.llm_concurrency,
+        queue_size=args.queue_size,
+        from_archive=args.from_archive,
+    )
+    asyncio.run(runner.run())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Deterministic stand-in for the Gemini ``GenerativeModel``.
+
+Implements just the ``generate_content`` surface RedditPersonaAnalyzer uses
+(plain, JSON-schema constrained and streaming calls), sleeps for a
+configurable latency instead of calling the API, and counts calls and tokens
+so benchmarks can report what would have been sent.
+"""
+import re
+import json
+import time
+import threading
+from collections import Counter
+from types import SimpleNamespace
+
+from corpus import STOPWORDS, estimate_tokens
+
+FACETS = ("goals", "frustrations", "interests", "motivations", "fears")
+WORD_RE = re.compile(r"[a-z']{4,}")
+QUESTION_RE = re.compile(r"list of the (\w+)")
+
+
+class FakeResponse:
+    def __init__(self, text, prompt_tokens):
+        self.text = text
+        self.usage_metadata = SimpleNamespace(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=estimate_tokens(text),
+            total_token_count=prompt_tokens + estimate_tokens(text),
+        )
+
+
+class FakeModel:
+    """
+    ``latency`` is paid once per call; ``seconds_per_1k_tokens`` adds a
+    prompt-size dependent part, so shrinking prompts shows up in wall time.
+    """
+
+    def __init__(self, latency=0.05, seconds_per_1k_tokens=0.0, stream_chunks=4):
+        self.latency = latency
+        self.seconds_per_1k_tokens = seconds_per_1k_tokens
+        self.stream_chunks = stream_chunks
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+
+    def generate_content(self, prompt, generation_config=None, stream=False, **kwargs):
+        prompt_tokens = estimate_tokens(prompt)
+        structured = bool(generation_config and generation_config.get("response_schema"))
+        text = self._answer(prompt, structured)
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.response_tokens += estimate_tokens(text)
+
+        delay = self.latency + self.seconds_per_1k_tokens * prompt_tokens / 1000
+        if stream:
+            return self._stream(text, prompt_tokens, delay)
+        time.sleep(delay)
+        return FakeResponse(text, prompt_tokens)
+
+    def stats(self):
+        with self._lock:
+            return {"llm_calls": self.calls, "prompt_tokens": self.prompt_tokens,
+                    "response_tokens": self.response_tokens}
+
+    def _stream(self, text, prompt_tokens, delay):
+        lines = text.split("\n")
+        size = max(1, -(-len(lines) // self.stream_chunks))
+        for start in range(0, len(lines), size):
+            time.sleep(delay / self.stream_chunks)
+            chunk = "\n".join(lines[start:start + size])
+            yield FakeResponse(chunk + ("\n" if start + size < len(lines) else ""), prompt_tokens)
+
+    @staticmethod
+    def _answer(prompt, structured):
+        """A plausible persona built from the most frequent words of the prompt."""
+        words = [word for word in WORD_RE.findall(prompt.lower()) if word not in STOPWORDS]
+        common = [word for word, _ in Counter(words).most_common(50)]
+        findings = {
+            facet: [f"Cares about {word} ({facet})" for word in common[i::len(FACETS)][:10]]
+            for i, facet in enumerate(FACETS)
+        }
+        if structured:
+            return json.dumps(findings)
+        # Facet prompts ask for "a list of the <facet> ..."; the question follows the user data.
+        asked = QUESTION_RE.findall(prompt.lower())
+        facet = asked[-1] if asked and asked[-1] in findings else FACETS[0]
+        return "\n".join(findings[facet])
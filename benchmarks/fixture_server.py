@@ -0,0 +1,312 @@
+"""
+Local stand-in for reddit.com serving recorded profile page fixtures.
+
+Every username gets a deterministic history (seeded from the name), rendered
+through the saved old / new / shreddit templates in ``fixtures/``. Profile
+pages show the first page of items and load the rest on scroll, like the real
+sites; the ``.json`` listings the HTTP backend reads are served from the same
+history, so both backends see identical data.
+"""
+import os
+import json
+import html
+import random
+import string
+import hashlib
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+LAYOUTS = ("old", "new", "shreddit")
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+SUBREDDITS = {
+    "python": ["asyncio", "type hints", "packaging", "pytest fixtures", "the GIL", "dataclasses", "pip resolver"],
+    "homelab": ["proxmox", "a used rack server", "power draw", "ZFS pools", "VLANs", "a UPS", "noisy fans"],
+    "cooking": ["sourdough", "cast iron", "knife skills", "meal prep", "stock from scraps", "a dutch oven"],
+    "running": ["a first marathon", "shin splints", "zone 2 training", "carbon plated shoes", "hill repeats"],
+    "personalfinance": ["an emergency fund", "index funds", "a car loan", "rent vs buy", "a 401k match"],
+    "boardgames": ["worker placement", "a solo campaign", "game night", "legacy games", "teaching rules"],
+}
+
+OPENERS = [
+    "I have been thinking about {topic} for a while now",
+    "Honestly {topic} is the thing I keep coming back to",
+    "Quick question about {topic}",
+    "After a year with {topic} here is what I learned",
+    "Can someone explain why {topic} is so divisive",
+    "My experience with {topic} was not what I expected",
+]
+
+DETAILS = [
+    "I tried it on weekends first and slowly made it part of my routine.",
+    "The hardest part was finding time after work without burning out.",
+    "I worry that I am wasting money on gear I do not really need.",
+    "A friend got me into it and now I spend far too long reading about it.",
+    "Most of the advice online contradicts itself, which is frustrating.",
+    "I want to get good enough to help other beginners avoid my mistakes.",
+    "Budget matters a lot to me so I usually go for the cheapest option that works.",
+    "Every time I think I understand it something new breaks.",
+    "I keep a spreadsheet to track progress and it keeps me motivated.",
+    "My partner thinks this hobby is taking over the apartment.",
+]
+
+REPLIES = [
+    "This is exactly what happened to me with {topic}.",
+    "Hard disagree, {topic} is overrated for most people.",
+    "Thanks, this helped a lot. I had no idea about {topic}.",
+    "Did you try asking in the weekly thread? {topic} comes up there all the time.",
+    "I switched away from {topic} last year and do not miss it.",
+    "Same here, {topic} took me months to get right.",
+]
+
+
+def _fullname(prefix, username, index):
+    digest = hashlib.sha1(f"{username}:{prefix}:{index}".encode("utf-8")).hexdigest()
+    return f"{prefix}_{int(digest[:10], 16):x}"[:10]
+
+
+def user_history(username, posts=60, comments=90):
+    """Deterministic (posts, comments) for ``username``, newest first, as listing ``data`` dicts."""
+    rng = random.Random(username.lower())
+    favourites = rng.sample(sorted(SUBREDDITS), 3)
+    created = EPOCH
+
+    def pick_subreddit():
+        return rng.choice(favourites) if rng.random() < 0.8 else rng.choice(sorted(SUBREDDITS))
+
+    post_items = []
+    for i in range(posts):
+        subreddit = pick_subreddit()
+        topic = rng.choice(SUBREDDITS[subreddit])
+        title = rng.choice(OPENERS).format(topic=topic)
+        body = " ".join(rng.sample(DETAILS, rng.randint(0, 4)))
+        created -= timedelta(hours=rng.randint(1, 72))
+        post_items.append({
+            "name": _fullname("t3", username, i),
+            "title": title,
+            "selftext": body,
+            "subreddit": subreddit,
+            "subreddit_name_prefixed": f"r/{subreddit}",
+            "score": rng.randint(1, 900),
+            "num_comments": rng.randint(0, 120),
+            "created_utc": created.timestamp(),
+        })
+
+    created = EPOCH
+    comment_items = []
+    for i in range(comments):
+        subreddit = pick_subreddit()
+        topic = rng.choice(SUBREDDITS[subreddit])
+        if comment_items and rng.random() < 0.1:
+            # Users repeat themselves; the corpus deduplication should see some of this.
+            body = comment_items[-1]["body"]
+        else:
+            body = rng.choice(REPLIES).format(topic=topic)
+            if rng.random() < 0.5:
+                body += " " + rng.choice(DETAILS)
+        created -= timedelta(hours=rng.randint(1, 24))
+        comment_items.append({
+            "name": _fullname("t1", username, i),
+            "body": body,
+            "subreddit": subreddit,
+            "subreddit_name_prefixed": f"r/{subreddit}",
+            "link_title": rng.choice(OPENERS).format(topic=topic),
+            "link_author": "".join(rng.choices(string.ascii_lowercase, k=8)),
+            "score": rng.randint(-5, 300),
+            "created_utc": created.timestamp(),
+        })
+    return post_items, comment_items
+
+
+def _read(*parts):
+    with open(os.path.join(FIXTURES_DIR, *parts), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+class FixtureSite:
+    """Renders one layout's page, post and comment templates for any username."""
+
+    def __init__(self, layout, page_size=25, posts=60, comments=90):
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown layout: {layout}")
+        self.layout = layout
+        self.page_size = page_size
+        self.posts = posts
+        self.comments = comments
+        self.page = string.Template(_read(layout, "page.html"))
+        self.templates = {
+            "submitted": string.Template(_read(layout, "post.html")),
+            "comments": string.Template(_read(layout, "comment.html")),
+        }
+        self._histories = {}
+        self._lock = threading.Lock()
+
+    def history(self, username, kind):
+        with self._lock:
+            if username not in self._histories:
+                self._histories[username] = user_history(username, self.posts, self.comments)
+            posts, comments = self._histories[username]
+        return posts if kind == "submitted" else comments
+
+    def render_page(self, username, kind):
+        items, next_offset = self.render_items(username, kind, 0)
+        return self.page.substitute(
+            page_title=html.escape(f"{username} ({'posts' if kind == 'submitted' else 'comments'})"),
+            username=html.escape(username),
+            kind=kind,
+            karma=sum(item["score"] for item in self.history(username, kind)),
+            items=items,
+            next_offset=next_offset,
+            posts_selected=' aria-current="page"' if kind == "submitted" else "",
+            comments_selected=' aria-current="page"' if kind == "comments" else "",
+        )
+
+    def render_items(self, username, kind, offset):
+        """HTML for one page of items starting at ``offset``, and the next offset (-1 when exhausted)."""
+        history = self.history(username, kind)
+        page = history[offset:offset + self.page_size]
+        end = offset + len(page)
+        rendered = "\n".join(self._render_item(username, kind, item) for item in page)
+        return rendered, end if end < len(history) else -1
+
+    def listing(self, username, kind, limit, after=None):
+        """Reddit-style JSON listing with an ``after`` cursor."""
+        history = self.history(username, kind)
+        start = 0
+        if after:
+            start = next((i + 1 for i, item in enumerate(history) if item["name"] == after), len(history))
+        page = history[start:start + min(limit, 100)]
+        child_kind = "t3" if kind == "submitted" else "t1"
+        more = start + len(page) < len(history)
+        return {
+            "kind": "Listing",
+            "data": {
+                "after": page[-1]["name"] if page and more else None,
+                "dist": len(page),
+                "children": [{"kind": child_kind, "data": item} for item in page],
+            },
+        }
+
+    def _render_item(self, username, kind, item):
+        fullname = item["name"]
+        created = datetime.fromtimestamp(item["created_utc"], tz=timezone.utc)
+        text = item["selftext"] if kind == "submitted" else item["body"]
+        title = item.get("title") or item["link_title"]
+        values = {
+            "fullname": fullname,
+            "short_id": hashlib.sha1(title.encode("utf-8")).hexdigest()[:6],
+            "comment_id": fullname.split("_", 1)[1],
+            "slug": "_".join(title.lower().split()[:6]),
+            "username": html.escape(username),
+            "subreddit": item["subreddit"],
+            "title": html.escape(title),
+            "link_title": html.escape(item.get("link_title", "")),
+            "link_author": item.get("link_author", ""),
+            "score": item["score"],
+            "num_comments": item.get("num_comments", 0),
+            "created": created.isoformat(),
+            "age": f"{(EPOCH - created).days or 1}d ago",
+            "body_html": "".join(f"<p>{html.escape(sentence.strip())}.</p>"
+                                 for sentence in text.split(".") if sentence.strip()),
+        }
+        return self.templates[kind].substitute(values)
+
+
+class FixtureServer:
+    """
+    Threaded HTTP server for a ``FixtureSite`` on localhost.
+
+    ``requests`` counts the hits per route (page, more, listing, static), so
+    benchmarks can report how many HTTP round trips a scrape needed.
+    """
+
+    def __init__(self, layout, host="127.0.0.1", port=0, **site_options):
+        self.site = FixtureSite(layout, **site_options)
+        self.requests = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fixture-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def request_count(self):
+        with self._lock:
+            return sum(self.requests.values())
+
+    def reset_counts(self):
+        with self._lock:
+            self.requests.clear()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count(self, route):
+        with self._lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+
+    def _handler(self):
+        server = self
+        scroll_js = _read("scroll.js").encode("utf-8")
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                parts = [part for part in url.path.split("/") if part]
+
+                if url.path == "/_static/scroll.js":
+                    server._count("static")
+                    return self._send(200, scroll_js, "application/javascript")
+                if len(parts) == 3 and parts[0] == "_more" and parts[2] in ("submitted", "comments"):
+                    server._count("more")
+                    offset = int(query.get("offset", ["0"])[0])
+                    items, next_offset = server.site.render_items(parts[1], parts[2], offset)
+                    return self._send(200, items.encode("utf-8"), "text/html", {"X-Next-Offset": str(next_offset)})
+                if len(parts) == 3 and parts[0] == "user" and parts[2] in ("submitted.json", "comments.json"):
+                    server._count("listing")
+                    kind = parts[2].removesuffix(".json")
+                    limit = int(query.get("limit", ["25"])[0])
+                    payload = server.site.listing(parts[1], kind, limit, query.get("after", [None])[0])
+                    return self._send(200, json.dumps(payload).encode("utf-8"), "application/json")
+                if len(parts) == 3 and parts[0] == "user" and parts[2] in ("submitted", "comments"):
+                    server._count("page")
+                    page = server.site.render_page(parts[1], parts[2])
+                    return self._send(200, page.encode("utf-8"), "text/html")
+
+                server._count("other")
+                self._send(404, b"<html><body>page not found</body></html>", "text/html")
+
+            def _send(self, status, body, content_type, headers=None):
+                self.send_response(status)
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,26 @@
+// Infinite scroll for the fixture pages: once the viewport reaches the bottom,
+// fetch the next page of items as an HTML fragment and append it to the feed.
+(function () {
+    var script = document.currentScript;
+    var feed = document.querySelector(script.dataset.feed);
+    var more = script.dataset.more;
+    var offset = parseInt(script.dataset.offset, 10);
+    var loading = false;
+
+    function load() {
+        if (loading || offset < 0) return;
+        if (window.innerHeight + window.scrollY < document.body.scrollHeight - 600) return;
+        loading = true;
+        fetch(more + '?offset=' + offset)
+            .then(function (response) {
+                offset = parseInt(response.headers.get('X-Next-Offset'), 10);
+                return response.text();
+            })
+            .then(function (html) {
+                feed.insertAdjacentHTML('beforeend', html);
+                loading = false;
+            });
+    }
+
+    window.addEventListener('scroll', load, {passive: true});
+})();
@@ -0,0 +1,76 @@
+"""
+Compare the default and lean Chrome profiles on real (or fixture) profile pages.
+
+    python -m benchmarks.page_weight spez kn0thing
+    python -m benchmarks.page_weight --base-url http://127.0.0.1:8000 bench_user_000
+
+Loads each user's posts and comments pages once with each profile and reports
+the requests made, bytes transferred, load time and browser memory, plus what
+lean mode saved per profile. Byte counts come from the Performance API, so
+cross-origin resources that do not send Timing-Allow-Origin count as 0 bytes:
+the savings are a lower bound.
+"""
+import sys
+import time
+import argparse
+
+from fetchers import DEFAULT_BASE_URL
+from instrumentation import browser_rss, configure_logging
+from lean_browser import page_weight
+
+PAGES = {"posts": "submitted", "comments": "comments"}
+
+
+def measure(username, lean, base_url):
+    """Load both profile pages in a fresh browser; returns the summed measurements."""
+    from scrap import RedditUserScraper
+    from selector_cache import SelectorCache
+
+    scraper = RedditUserScraper(headless=True, selector_cache=SelectorCache(path=None), base_url=base_url, lean=lean)
+    totals = {"requests": 0, "transfer_bytes": 0, "load_seconds": 0.0, "rss_bytes": 0}
+    try:
+        for kind, path in PAGES.items():
+            selectors = scraper.POST_SELECTORS if kind == "posts" else scraper.COMMENT_SELECTORS
+            started = time.perf_counter()
+            scraper.driver.get(f"{scraper.base_url}/user/{username}/{path}/")
+            scraper.waiter.page_ready(selectors, label=f"{kind}_page_load")
+            totals["load_seconds"] += time.perf_counter() - started
+
+            weight = page_weight(scraper.driver) or {}
+            totals["requests"] += weight.get("requests", 0)
+            totals["transfer_bytes"] += weight.get("transfer_bytes", 0)
+        totals["rss_bytes"] = browser_rss(scraper.driver) or 0
+    finally:
+        scraper.close()
+    return totals
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Bytes, time and memory saved by the lean Chrome profile.")
+    parser.add_argument("usernames", nargs="+")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_logging("WARNING")
+
+    results = {False: [], True: []}
+    for username in args.usernames:
+        for lean in (False, True):
+            results[lean].append(measure(username, lean, args.base_url))
+
+    def average(rows, key):
+        return sum(row[key] for row in rows) / len(rows)
+
+    print(f"{'per profile':<16}{'default':>16}{'lean':>16}{'saved':>16}")
+    for key in ("requests", "transfer_bytes", "load_seconds", "rss_bytes"):
+        default, lean = average(results[False], key), average(results[True], key)
+        saved = f"{(default - lean) / default:.0%}" if default else "-"
+        print(f"{key:<16}{default:>16.2f}{lean:>16.2f}{saved:>16}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,284 @@
+"""
+Offline benchmark: scrape fixture profiles and build personas with a fake model.
+
+    python -m benchmarks.run --backend http         # 1/10/100 users on every layout, no browser needed
+    python -m benchmarks.run --users 10 --layout shreddit
+    python -m benchmarks.run --save-baseline        # record the current numbers
+
+Each scenario starts a local fixture server for one layout, drives the real
+RedditUserScraper (through the Selenium fetcher and a driver pool) or the
+HTTP fetcher against it, then runs RedditPersonaAnalyzer.build_persona with
+a FakeModel. Results are compared with ``benchmarks/baseline.json``; any
+metric that got worse by more than its tolerance is reported and the command
+exits with status 1. A scenario with no baseline to compare against exits
+with status 2 unless ``--save-baseline`` records one. The committed baseline
+covers the HTTP backend, which needs no browser.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from async_scrape import run, scrape_many
+from instrumentation import configure_logging, process_tree_rss
+from benchmarks.fake_model import FakeModel
+from benchmarks.fixture_server import LAYOUTS, FixtureServer
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Allowed relative increase over the baseline before a metric counts as a regression.
+TOLERANCES = {
+    "wall_seconds": 0.25,
+    "scrape_seconds": 0.25,
+    "persona_seconds": 0.25,
+    "webdriver_commands": 0.05,
+    "http_requests": 0.05,
+    "llm_calls": 0.0,
+    "prompt_tokens": 0.05,
+    "peak_rss_bytes": 0.20,
+    "python_peak_bytes": 0.20,
+}
+
+# Absolute slack for timings so sub-second runs do not fail on scheduler noise.
+MIN_SECONDS_DELTA = 0.5
+
+# Metrics that must not drop: fewer items scraped is a correctness regression.
+MUST_NOT_DROP = ("posts", "comments", "personas")
+
+
+class PeakSampler:
+    """Samples the RSS of this process and its children (chromedriver, Chrome) in the background."""
+
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        self.peak = max(self.peak, process_tree_rss(os.getpid()) or 0)
+
+
+class CommandCounter:
+    """Counts WebDriver commands, i.e. browser round trips, across every pooled driver."""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def wrap(self, driver):
+        execute = driver.execute
+
+        def counted(driver_command, params=None):
+            with self._lock:
+                self.count += 1
+            return execute(driver_command, params)
+
+        driver.execute = counted
+        return driver
+
+
+def build_fetcher(backend, base_url, pool_size, counter):
+    """Return ``(fetcher, close)`` for the requested backend pointed at ``base_url``."""
+    if backend == "http":
+        from fetchers import HttpFetcher
+
+        fetcher = HttpFetcher(base_url=base_url, rate_limiter=None)
+        return fetcher, fetcher.close
+
+    from driver_pool import DriverPool
+    from scrap import RedditUserScraper, SeleniumFetcher
+    from selector_cache import SelectorCache
+
+    selector_cache = SelectorCache(path=None)
+
+    def factory():
+        scraper = RedditUserScraper(headless=True, selector_cache=selector_cache, base_url=base_url)
+        counter.wrap(scraper.driver)
+        return scraper
+
+    pool = DriverPool(factory, size=pool_size)
+    return SeleniumFetcher(pool=pool, rate_limiter=None), pool.close
+
+
+def run_scenario(backend, layout, users, args):
+    """Scrape and analyze ``users`` fixture profiles; returns the metrics dict."""
+    from model import RedditPersonaAnalyzer
+    from persona_cache import PersonaCache
+
+    usernames = [f"bench_user_{i:03d}" for i in range(users)]
+    counter = CommandCounter()
+    model = FakeModel(latency=args.latency, seconds_per_1k_tokens=args.seconds_per_1k_tokens)
+
+    with FixtureServer(layout) as server, tempfile.TemporaryDirectory() as tmp:
+        fetcher, close = build_fetcher(backend, server.url, args.pool_size, counter)
+        # A fresh cache per scenario so every persona is generated, never served from disk.
+        cache = PersonaCache(os.path.join(tmp, "persona_cache.sqlite3"))
+
+        def fetch(kind, username, limit):
+            method = fetcher.fetch_posts if kind == "posts" else fetcher.fetch_comments
+            return method(username, limit)
+
+        def analyze(username, posts, comments):
+            analyzer = RedditPersonaAnalyzer(username, model=model, cache=cache, posts=posts, comments=comments)
+            return analyzer.build_persona()
+
+        tracemalloc.start()
+        try:
+            with PeakSampler() as sampler:
+                started = time.perf_counter()
+                results = run(scrape_many(usernames, fetch, args.max_posts, args.max_comments, args.concurrency))
+                scraped = time.perf_counter()
+
+                ok = {name: result for name, result in results.items() if not isinstance(result, Exception)}
+                with ThreadPoolExecutor(max_workers=args.llm_concurrency) as executor:
+                    personas = list(executor.map(lambda name: analyze(name, *ok[name]), ok))
+                finished = time.perf_counter()
+            python_peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+            close()
+            cache.disk.close()
+
+    return {
+        "users": users,
+        "wall_seconds": round(finished - started, 3),
+        "scrape_seconds": round(scraped - started, 3),
+        "persona_seconds": round(finished - scraped, 3),
+        "seconds_per_user": round((finished - started) / users, 3),
+        "failed": users - len(ok),
+        "posts": sum(len(posts) for posts, _ in ok.values()),
+        "comments": sum(len(comments) for _, comments in ok.values()),
+        "personas": sum(1 for persona in personas if any(persona.values())),
+        "webdriver_commands": counter.count,
+        "http_requests": server.request_count(),
+        **model.stats(),
+        "peak_rss_bytes": sampler.peak,
+        "python_peak_bytes": python_peak,
+    }
+
+
+def compare(results, baseline, scale=1.0):
+    """Return one message per metric that regressed against the baseline."""
+    regressions = []
+    for scenario, metrics in results.items():
+        expected = baseline.get(scenario)
+        if not expected:
+            continue
+        for name, tolerance in TOLERANCES.items():
+            old, new = expected.get(name), metrics.get(name)
+            if not old or new is None:
+                continue
+            allowed = old * (1 + tolerance * scale)
+            if name.endswith("_seconds"):
+                allowed = max(allowed, old + MIN_SECONDS_DELTA)
+            if new > allowed:
+                regressions.append(f"{scenario}: {name} {new} > {old} (+{(new - old) / old:.0%}, allowed +{tolerance * scale:.0%})")
+        if metrics.get("failed", 0) > expected.get("failed", 0):
+            regressions.append(f"{scenario}: {metrics['failed']} users failed (baseline {expected.get('failed', 0)})")
+        for name in MUST_NOT_DROP:
+            if name in expected and metrics.get(name, 0) < expected[name]:
+                regressions.append(f"{scenario}: {name} dropped from {expected[name]} to {metrics.get(name)}")
+    return regressions
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def print_table(results, baseline):
+    columns = ["wall_seconds", "seconds_per_user", "webdriver_commands", "http_requests",
+               "llm_calls", "prompt_tokens", "peak_rss_bytes", "python_peak_bytes"]
+    print(f"{'scenario':<22}" + "".join(f"{column:>20}" for column in columns))
+    for scenario, metrics in results.items():
+        print(f"{scenario:<22}" + "".join(f"{metrics.get(column, ''):>20}" for column in columns))
+        expected = baseline.get(scenario)
+        if expected:
+            print(f"{'  baseline':<22}" + "".join(f"{expected.get(column, ''):>20}" for column in columns))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline scrape + persona benchmark against recorded fixtures.")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 10, 100], help="user counts to run")
+    parser.add_argument("--layout", nargs="+", choices=LAYOUTS, default=list(LAYOUTS))
+    parser.add_argument("--backend", nargs="+", choices=["selenium", "http"], default=["selenium"])
+    parser.add_argument("--max-posts", type=int, default=20)
+    parser.add_argument("--max-comments", type=int, default=30)
+    parser.add_argument("--pool-size", type=int, default=2, help="warm browsers in the driver pool")
+    parser.add_argument("--concurrency", type=int, default=4, help="users scraped at once")
+    parser.add_argument("--llm-concurrency", type=int, default=8, help="personas generated at once")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake model seconds per call")
+    parser.add_argument("--seconds-per-1k-tokens", type=float, default=0.01, help="fake model prompt cost")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the new baseline")
+    parser.add_argument("--tolerance-scale", type=float, default=1.0, help="multiply every tolerance, e.g. 2 on noisy CI")
+    parser.add_argument("--out", help="also write the results as JSON here")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_logging(os.environ.get("REDDIT_LOG_LEVEL", "WARNING"))
+    # The fake model has no quota; pacing it like Gemini would make the persona stage time the limiter.
+    os.environ.setdefault("REDDIT_GEMINI_RPM", "1000000")
+    os.environ.setdefault("REDDIT_GEMINI_BURST", "1000")
+
+    results = {}
+    for backend in args.backend:
+        for layout in args.layout:
+            for users in args.users:
+                scenario = f"{backend}/{layout}/{users}"
+                print(f"Running {scenario} ...", flush=True)
+                results[scenario] = run_scenario(backend, layout, users, args)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    baseline = load_baseline(args.baseline)
+    print_table(results, baseline)
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    missing = [scenario for scenario in results if scenario not in baseline]
+    if missing:
+        print(f"No baseline for {', '.join(missing)} in {args.baseline}; run with --save-baseline to record one.")
+        return 2
+
+    regressions = compare(results, baseline, args.tolerance_scale)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    if regressions:
+        return 1
+    print("No regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
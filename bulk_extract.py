@@ -0,0 +1,218 @@
+import os
+
+# Reddit fullname (t3_ post / t1_ comment) of a container, read from whichever
+# attribute the current layout uses, or from the first descendant carrying one.
+ITEM_ID_FUNCTION = """
+function itemId(node) {
+    const FULLNAME = /^t[13]_[a-z0-9]+$/i;
+    const attributes = ['data-fullname', 'thingid', 'post-id', 'comment-id', 'id'];
+    const candidates = [node, node.querySelector('[data-fullname], [thingid], [id^="t3_"], [id^="t1_"], [id^="thing_t"]')];
+    for (const candidate of candidates) {
+        if (!candidate) continue;
+        for (const attribute of attributes) {
+            const value = (candidate.getAttribute(attribute) || '').replace(/^thing_/, '');
+            if (FULLNAME.test(value)) return value;
+        }
+    }
+    return null;
+}
+"""
+
+ITEM_ID_SCRIPT = ITEM_ID_FUNCTION + "return itemId(arguments[0]);"
+
+# Prefixed subreddit ("r/name") a comment was made in. Old Reddit and shreddit
+# carry it as an attribute on the comment or its wrapper; new Reddit only
+# renders an "r/name" link in the header next to the comment, so the comment
+# and the sibling right before it (unless that is another item) are searched.
+SUBREDDIT_FUNCTION = """
+function subredditOf(node) {
+    const PREFIXED = /^r\\/[A-Za-z0-9_]+$/;
+    const holder = node.closest('[data-subreddit-prefixed], [subreddit-prefixed-name]');
+    if (holder) {
+        return holder.getAttribute('data-subreddit-prefixed') || holder.getAttribute('subreddit-prefixed-name');
+    }
+    const header = node.previousElementSibling;
+    const scopes = [node];
+    if (header && !itemId(header)) scopes.push(header);
+    for (const scope of scopes) {
+        for (const link of scope.querySelectorAll('a[href^="/r/"]')) {
+            const text = (link.textContent || '').trim();
+            if (PREFIXED.test(text)) return text;
+        }
+    }
+    return null;
+}
+"""
+
+SUBREDDIT_SCRIPT = ITEM_ID_FUNCTION + SUBREDDIT_FUNCTION + "return subredditOf(arguments[0]);"
+
+# Whether a container is pinned/stickied to the top of the profile: old
+# Reddit's .stickied things, shreddit's pinned/stickied attributes and the pin
+# badge new Reddit and shreddit render next to the title.
+PINNED_FUNCTION = """
+function isPinned(node) {
+    if (node.classList.contains('stickied') || node.hasAttribute('pinned') || node.hasAttribute('stickied')) {
+        return true;
+    }
+    return !!node.querySelector('.stickied-tagline, [data-testid="pinned-post-badge"], [icon-name="pin-fill"]');
+}
+"""
+
+PINNED_SCRIPT = PINNED_FUNCTION + "return isPinned(arguments[0]);"
+
+# Containers the scroll loop has already extracted carry this attribute.
+SEEN_ATTRIBUTE = "data-rps-seen"
+
+# Frees the subtree of processed containers so an infinite-scroll page holds
+# one empty box per item instead of the full markup. The container itself stays
+# (the page's framework may still reference it) and keeps its height so the
+# scroll position and the "load more" trigger do not move. Heights are read
+# for every node before any is emptied to avoid one forced layout per node.
+# Off unless REDDIT_RELEASE_NODES=1: React/Lit pages (new Reddit, shreddit)
+# may re-render or read an emptied node and break the listing.
+RELEASE_NODES = os.environ.get("REDDIT_RELEASE_NODES", "0") == "1"
+RELEASE_FUNCTION = """
+function release(nodes) {
+    const heights = nodes.map(node => node.offsetHeight);
+    nodes.forEach((node, i) => {
+        node.style.height = heights[i] + 'px';
+        node.style.contain = 'strict';
+        node.replaceChildren();
+    });
+}
+"""
+
+# Marks elements extracted one by one as seen and optionally releases them.
+MARK_SEEN_SCRIPT = RELEASE_FUNCTION + """
+const nodes = Array.from(arguments[0]), shouldRelease = arguments[1];
+for (const node of nodes) node.setAttribute('""" + SEEN_ATTRIBUTE + """', '1');
+if (shouldRelease) release(nodes);
+"""
+
+# Runs inside the page: finds the first container selector with matches, then
+# extracts every field for every container not yet marked as seen, mirroring
+# the fallback rules of RedditUserScraper.extract_post_data/extract_comment_data.
+BULK_EXTRACT_SCRIPT = ITEM_ID_FUNCTION + SUBREDDIT_FUNCTION + PINNED_FUNCTION + RELEASE_FUNCTION + """
+const containers = arguments[0], fields = arguments[1], limit = arguments[2], shouldRelease = arguments[3];
+const SEEN = '""" + SEEN_ATTRIBUTE + """';
+
+function textOf(node) {
+    return ((node.innerText !== undefined ? node.innerText : node.textContent) || '').trim();
+}
+
+function firstText(node, field) {
+    for (const selector of field.selectors) {
+        const match = node.querySelector(selector);
+        if (match) return [selector, textOf(match)];
+    }
+    return [null, null];
+}
+
+function collectedText(node, field) {
+    for (const selector of field.selectors) {
+        let collected = '';
+        for (const match of node.querySelectorAll(selector)) {
+            const text = textOf(match);
+            if (text && text.length > field.min_length) collected += text + '\\n';
+        }
+        if (collected.trim()) return [selector, collected.trim()];
+    }
+    const lines = textOf(node).split('\\n');
+    for (const line of lines) {
+        if (line.trim() && line.length > field.fallback_length) return [null, line.trim()];
+    }
+    return [null, null];
+}
+
+// The winning selector is the first that matches at all (seen or not), so it
+// stays stable across scrolls; only the unseen matches are walked.
+let selector = null;
+for (const candidate of containers) {
+    if (document.querySelector(candidate)) { selector = candidate; break; }
+}
+const nodes = selector ? document.querySelectorAll(selector + ':not([' + SEEN + '])') : [];
+
+const items = [], processed = [];
+for (const node of nodes) {
+    if (items.length >= limit) break;
+    node.setAttribute(SEEN, '1');
+    processed.push(node);
+
+    const item = {id: itemId(node), pinned: isPinned(node), values: {}, winners: {}};
+    for (const field of fields) {
+        const [winner, value] = field.mode === 'collect' ? collectedText(node, field)
+            : field.mode === 'subreddit' ? [null, subredditOf(node)] : firstText(node, field);
+        item.values[field.name] = value;
+        item.winners[field.name] = winner;
+    }
+    items.push(item);
+}
+if (shouldRelease) release(processed);
+
+return {selector: selector, total: nodes.length, items: items};
+"""
+
+POST_DEFAULTS = {
+    "title": "No title found",
+    "content": "No content found",
+    "subreddit": "Unknown",
+}
+
+COMMENT_DEFAULTS = {
+    "text": "No text found",
+    "subreddit": "Unknown",
+}
+
+
+def post_fields(title_selectors, content_selectors, subreddit_selectors):
+    """Field spec for posts, in the same order and with the same rules as extract_post_data."""
+    return [
+        {"name": "title", "role": "post_title", "mode": "first", "selectors": title_selectors},
+        {"name": "content", "role": "post_content", "mode": "collect", "selectors": content_selectors,
+         "min_length": 10, "fallback_length": 50},
+        {"name": "subreddit", "role": "post_subreddit", "mode": "first", "selectors": subreddit_selectors},
+    ]
+
+
+def comment_fields(text_selectors):
+    """Field spec for comments, with the same rules as extract_comment_data."""
+    return [
+        {"name": "text", "role": "comment_text", "mode": "collect", "selectors": text_selectors,
+         "min_length": 5, "fallback_length": 20},
+        {"name": "subreddit", "role": "comment_subreddit", "mode": "subreddit", "selectors": []},
+    ]
+
+
+def unseen(selectors):
+    """Restrict container selectors to the nodes not extracted yet."""
+    return [f"{selector}:not([{SEEN_ATTRIBUTE}])" for selector in selectors]
+
+
+def mark_seen(driver, elements, release=False):
+    """Mark elements extracted one by one as seen (and release them) in one round trip."""
+    if elements:
+        driver.execute_script(MARK_SEEN_SCRIPT, elements, release)
+
+
+def extract_batch(driver, container_selectors, fields, limit, release=False):
+    """
+    Extract up to ``limit`` unseen containers in a single ``execute_script`` call.
+
+    Returns ``(selector, total, items)`` where ``total`` is the number of
+    matching containers not extracted before this call and each item carries its Reddit ``id``,
+    whether it is ``pinned``, the raw ``values`` and the ``winners`` (matching selector per field).
+    With ``release`` the extracted containers are emptied afterwards.
+    """
+    payload = driver.execute_script(BULK_EXTRACT_SCRIPT, container_selectors, fields, limit, release) or {}
+    return payload.get("selector"), payload.get("total", 0), payload.get("items", [])
+
+
+def to_record(values, defaults, item_id=None):
+    """Turn extracted values into the dict shape produced by the per-element extractors."""
+    record = {}
+    for name, default in defaults.items():
+        value = (values.get(name) or "").strip()
+        record[name] = value if value else default
+    if item_id:
+        record["id"] = item_id
+    return record
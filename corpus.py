@@ -0,0 +1,287 @@
+import os
+import re
+import json
+import math
+import zlib
+import hashlib
+import numpy as np
+
+DEFAULT_TOKEN_BUDGET = int(os.environ.get("REDDIT_PROMPT_TOKEN_BUDGET", "24000"))
+
+# Histories with more items than this are clustered first and only a
+# representative subset (plus an activity summary) goes into the prompt.
+REPRESENTATIVE_MIN_ITEMS = int(os.environ.get("REDDIT_REPRESENTATIVE_MIN_ITEMS", "200"))
+
+# Values the scrapers emit when a field is missing; they carry no signal.
+PLACEHOLDERS = {"No title found", "No content found", "No text found", "Unknown", ""}
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from", "has", "have", "i", "if",
+    "in", "is", "it", "its", "just", "me", "my", "not", "of", "on", "or", "so", "that", "the", "this",
+    "to", "was", "we", "were", "what", "with", "you", "your",
+}
+
+# Unicode-aware, so Cyrillic, CJK or Arabic text is not reduced to an empty word list.
+WORD_RE = re.compile(r"[\w']+")
+
+# MinHash/LSH for near-duplicate detection: 16 bands of 4 rows put two items
+# with trigram Jaccard 0.8 in a shared bucket with probability > 0.999, so only
+# bucket-mates are compared exactly instead of every pair.
+MINHASH_BANDS = 16
+MINHASH_ROWS = 4
+# Bucket-mates whose signatures agree on fewer than this share of hashes are
+# dismissed without an exact comparison (two standard errors below 0.8).
+MINHASH_PREFILTER = 0.7
+# Shingles hashed per vectorised step (bounds the permutation matrix to ~30 MB).
+MINHASH_CHUNK = 60000
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return math.ceil(len(text) / 4) if text else 0
+
+
+def parse_items(data):
+    """Accept the JSON strings returned by scrap.main() as well as plain lists."""
+    if not data:
+        return []
+    if isinstance(data, str):
+        try:
+            data = json.loads(data)
+        except ValueError:
+            return []
+    return [item for item in data if isinstance(item, dict)]
+
+
+def _clean(value):
+    value = " ".join(str(value or "").split())
+    return "" if value in PLACEHOLDERS else value
+
+
+def normalise_post(post):
+    subreddit = _clean(post.get("subreddit"))
+    title = _clean(post.get("title"))
+    content = _clean(post.get("content"))
+    if content == title:
+        content = ""
+    text = " | ".join(part for part in (title, content) if part)
+    return {"kind": "P", "subreddit": subreddit, "text": text} if text else None
+
+
+def normalise_comment(comment):
+    text = _clean(comment.get("text"))
+    return {"kind": "C", "subreddit": _clean(comment.get("subreddit")), "text": text} if text else None
+
+
+def _words(text):
+    return WORD_RE.findall(text.casefold())
+
+
+def _shingles(words, size=3):
+    """Word n-grams as tuples (cheaper to build and compare than joined strings)."""
+    if len(words) < size:
+        return {tuple(words)}
+    return set(zip(*(words[i:] for i in range(size))))
+
+
+def _jaccard(a, b):
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+def minhash(shingle_sets, bands=MINHASH_BANDS, rows=MINHASH_ROWS, seed=0):
+    """
+    MinHash signatures of each shingle set, shape ``(len(shingle_sets), bands * rows)``,
+    and their LSH band keys, shape ``(len(shingle_sets), bands)``. Sets sharing a
+    key in any band are near-duplicate candidates; the share of equal signature
+    entries estimates their Jaccard similarity.
+    """
+    lengths = np.fromiter((len(shingles) for shingles in shingle_sets), dtype=np.int64, count=len(shingle_sets))
+    # Hash each distinct shingle once; recurring phrases are common within one user's history.
+    codes = {}
+    for shingles in shingle_sets:
+        for shingle in shingles:
+            if shingle not in codes:
+                codes[shingle] = zlib.crc32(" ".join(shingle).encode("utf-8"))
+    hashes = np.fromiter(
+        (codes[shingle] for shingles in shingle_sets for shingle in shingles),
+        dtype=np.uint64, count=int(lengths.sum()),
+    )
+    # Multiply-shift hashing; uint64 arithmetic wraps, which is what the scheme relies on.
+    rng = np.random.default_rng(seed)
+    multipliers = rng.integers(1, 2 ** 63, size=(bands * rows, 1), dtype=np.uint64) | np.uint64(1)
+    offsets = rng.integers(0, 2 ** 63, size=(bands * rows, 1), dtype=np.uint64)
+
+    signatures = np.empty((len(shingle_sets), bands * rows), dtype=np.uint64)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    first = 0
+    while first < len(shingle_sets):
+        # Whole sets per chunk, so reduceat never spans two chunks.
+        last = int(np.searchsorted(starts, starts[first] + MINHASH_CHUNK, side="right"))
+        last = max(last, first + 1)
+        end = starts[last] if last < len(shingle_sets) else len(hashes)
+        permuted = (hashes[starts[first]:end] * multipliers + offsets) >> np.uint64(32)
+        signatures[first:last] = np.minimum.reduceat(permuted, starts[first:last] - starts[first], axis=1).T
+        first = last
+
+    weights = rng.integers(1, 2 ** 63, size=rows, dtype=np.uint64)
+    return signatures, (signatures.reshape(len(shingle_sets), bands, rows) * weights).sum(axis=2)
+
+
+def deduplicate(items, threshold=0.8):
+    """
+    Drop exact duplicates (after normalisation) and near duplicates whose
+    word-trigram Jaccard similarity with an already kept item is >= threshold.
+    Only items that share a MinHash LSH bucket and look similar by signature are compared exactly.
+    """
+    # Exact duplicates first: a later copy of any item is dropped whether or not the first was kept.
+    unique, shingle_sets, seen_hashes = [], [], set()
+    for item in items:
+        words = _words(item["text"])
+        # Text without word characters (emoji, symbols) is compared as a whole instead.
+        normalised = " ".join(words) or item["text"]
+        digest = hashlib.sha1(normalised.encode("utf-8")).hexdigest()
+        if digest not in seen_hashes:
+            seen_hashes.add(digest)
+            unique.append(item)
+            shingle_sets.append(_shingles(words) if words else {(normalised,)})
+    if not unique:
+        return []
+    signatures, band_keys = minhash(shingle_sets)
+    min_agreement = math.ceil(MINHASH_PREFILTER * signatures.shape[1])
+
+    kept, buckets = [], [{} for _ in range(band_keys.shape[1])]
+    for index, keys in enumerate(band_keys.tolist()):
+        candidates = set()
+        for bucket, key in zip(buckets, keys):
+            members = bucket.get(key)
+            if members:
+                candidates.update(members)
+        if candidates:
+            candidates = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+            agreement = np.count_nonzero(signatures[candidates] == signatures[index], axis=1)
+            shingles = shingle_sets[index]
+            if any(_jaccard(shingles, shingle_sets[other]) >= threshold
+                   for other in candidates[agreement >= min_agreement].tolist()):
+                continue
+        for bucket, key in zip(buckets, keys):
+            bucket.setdefault(key, []).append(index)
+        kept.append(unique[index])
+    return kept
+
+
+def informativeness(item):
+    """Favour items with many distinct content words; long rambling text gets diminishing returns."""
+    words = _words(item["text"])
+    distinct = {word for word in words if word not in STOPWORDS and len(word) > 2}
+    return len(distinct) + math.log1p(len(words))
+
+
+def serialize(item, max_chars=None):
+    """One compact line per item: 'P r/sub: title | body' or 'C r/sub: text'."""
+    text = item["text"]
+    if max_chars and len(text) > max_chars:
+        text = text[:max_chars].rsplit(" ", 1)[0] + "…"
+    prefix = f"{item['kind']} {item['subreddit']}" if item["subreddit"] else item["kind"]
+    return f"{prefix}: {text}"
+
+
+class Corpus:
+    """
+    Prompt-ready text plus the numbers needed to see what the preparation saved.
+
+    ``items`` are the items that made it into ``text``; ``selected`` are the
+    items the budget chose from (the representative selection of a long
+    history, otherwise the whole deduplicated history), kept so map-reduce
+    can shard them without preparing anything again.
+    """
+
+    def __init__(self, text, items, tokens_before, tokens_after, stats, summary="", selected=None):
+        self.text = text
+        self.summary = summary
+        self.items = items
+        self.selected = items if selected is None else selected
+        self.tokens_before = tokens_before
+        self.tokens_after = tokens_after
+        self.stats = stats
+
+    def report(self):
+        saved = self.tokens_before - self.tokens_after
+        ratio = saved / self.tokens_before if self.tokens_before else 0.0
+        return dict(self.stats, tokens_before=self.tokens_before, tokens_after=self.tokens_after,
+                    tokens_saved=saved, saved_ratio=round(ratio, 3))
+
+
+def prepare_items(posts, comments):
+    """Parse, normalise, strip placeholders and deduplicate posts + comments, in listing order."""
+    items = [normalise_post(post) for post in parse_items(posts)]
+    items += [normalise_comment(comment) for comment in parse_items(comments)]
+    return deduplicate([item for item in items if item])
+
+
+def build_corpus(posts, comments, token_budget=DEFAULT_TOKEN_BUDGET, count_tokens=estimate_tokens,
+                 representative_min_items=REPRESENTATIVE_MIN_ITEMS):
+    """
+    Turn scraped posts and comments into a compact corpus that fits ``token_budget``.
+
+    Items are cleaned and deduplicated, ranked by informativeness and added
+    greedily until the budget is reached; the chosen lines keep their
+    original (newest first) order. Histories larger than
+    ``representative_min_items`` are first reduced to a topically diverse
+    subset, and the corpus ``summary`` describes the whole history.
+    """
+    raw_posts, raw_comments = parse_items(posts), parse_items(comments)
+    tokens_before = count_tokens(f"{posts}, {comments}")
+
+    items = prepare_items(raw_posts, raw_comments)
+    items_after_dedup = len(items)
+    summary, clusters = "", 0
+    if representative_min_items and len(items) > representative_min_items:
+        from representative import select_representative
+
+        selection = select_representative(items)
+        items, summary, clusters = selection.items, selection.summary(), len(selection.clusters)
+        token_budget -= count_tokens(summary) + 1
+    max_item_chars = max(200, token_budget)  # ~ a quarter of the budget in tokens
+
+    ranked = sorted(range(len(items)), key=lambda i: informativeness(items[i]), reverse=True)
+    chosen, used = [], 0
+    for index in ranked:
+        line = serialize(items[index], max_item_chars)
+        cost = count_tokens(line) + 1
+        if used + cost > token_budget:
+            continue
+        chosen.append((index, line))
+        used += cost
+
+    chosen.sort()
+    text = "\n".join(line for _, line in chosen)
+    stats = {
+        "items_in": len(raw_posts) + len(raw_comments),
+        "items_after_dedup": items_after_dedup,
+        "items_selected": len(items),
+        "clusters": clusters,
+        "items_kept": len(chosen),
+    }
+    tokens_after = count_tokens(text) + (count_tokens(summary) if summary else 0)
+    return Corpus(text, [items[index] for index, _ in chosen], tokens_before, tokens_after, stats, summary, items)
+
+
+def shard_corpus(items, shard_budget=DEFAULT_TOKEN_BUDGET, count_tokens=estimate_tokens):
+    """
+    Split prepared ``items`` (e.g. ``Corpus.selected``) into consecutive shards
+    of at most ``shard_budget`` tokens each, for map-reduce over users too
+    large for one prompt. Nothing is dropped.
+    """
+    shards, lines, used = [], [], 0
+    for item in items:
+        line = serialize(item, max(200, shard_budget))
+        cost = count_tokens(line) + 1
+        if lines and used + cost > shard_budget:
+            shards.append("\n".join(lines))
+            lines, used = [], 0
+        lines.append(line)
+        used += cost
+    if lines:
+        shards.append("\n".join(lines))
+    return shards
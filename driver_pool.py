@@ -0,0 +1,171 @@
+import time
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class DriverPool:
+    """
+    Bounded pool of warm scraper sessions.
+
+    Sessions are created lazily by ``factory`` up to ``size`` and handed out
+    with ``acquire``/``release`` (or the ``borrow`` context manager). A session
+    is health-checked before it is handed out and recycled after ``max_uses``
+    borrows or as soon as a borrower reports it broken.
+    """
+
+    def __init__(self, factory, size=2, max_uses=25, acquire_timeout=120):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1.")
+        self.factory = factory
+        self.size = size
+        self.max_uses = max_uses
+        self.acquire_timeout = acquire_timeout
+
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._uses = {}
+        self._open = 0
+        self._closed = False
+
+        self._stats = {
+            "created": 0,
+            "recycled": 0,
+            "failed_health_checks": 0,
+            "acquired": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+        }
+
+    def acquire(self, timeout=None):
+        """Borrow a healthy session, starting a new one if the pool has room."""
+        if self._closed:
+            raise RuntimeError("Driver pool is closed.")
+
+        timeout = self.acquire_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        while True:
+            session = self._take_idle()
+            if session is None and self._reserve_slot():
+                try:
+                    session = self._create()
+                except Exception:
+                    self._release_slot()
+                    raise
+
+            if session is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No scraper session available after {timeout}s")
+                # Poll so a slot freed by a recycled session is noticed too.
+                try:
+                    session = self._idle.get(timeout=min(remaining, 0.5))
+                except queue.Empty:
+                    continue
+
+            if self._is_healthy(session):
+                break
+
+            with self._lock:
+                self._stats["failed_health_checks"] += 1
+            self._discard(session)
+
+        waited = time.monotonic() - started
+        with self._lock:
+            self._uses[id(session)] = self._uses.get(id(session), 0) + 1
+            self._stats["acquired"] += 1
+            self._stats["wait_time_total"] += waited
+            self._stats["wait_time_max"] = max(self._stats["wait_time_max"], waited)
+        return session
+
+    def release(self, session, broken=False):
+        """Return a borrowed session; broken or worn-out sessions are recycled."""
+        with self._lock:
+            worn_out = self._uses.get(id(session), 0) >= self.max_uses
+
+        if broken or worn_out or self._closed:
+            with self._lock:
+                self._stats["recycled"] += 1
+            self._discard(session)
+            return
+
+        self._idle.put(session)
+
+    @contextmanager
+    def borrow(self, timeout=None):
+        """Context manager around ``acquire``/``release``."""
+        session = self.acquire(timeout)
+        broken = False
+        try:
+            yield session
+        except Exception:
+            broken = not self._is_healthy(session)
+            raise
+        finally:
+            self.release(session, broken=broken)
+
+    def stats(self):
+        """Return pool size, utilisation and wait-time metrics."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = self.size
+            stats["open"] = self._open
+            stats["idle"] = self._idle.qsize()
+            stats["in_use"] = self._open - stats["idle"]
+        acquired = stats["acquired"]
+        stats["wait_time_avg"] = stats["wait_time_total"] / acquired if acquired else 0.0
+        return stats
+
+    def close(self):
+        """Shut down every idle session and refuse further borrows."""
+        self._closed = True
+        while True:
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(session)
+
+    def _take_idle(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return None
+
+    def _reserve_slot(self):
+        with self._lock:
+            if self._open < self.size:
+                self._open += 1
+                return True
+            return False
+
+    def _release_slot(self):
+        with self._lock:
+            self._open -= 1
+
+    def _create(self):
+        session = self.factory()
+        with self._lock:
+            self._stats["created"] += 1
+            self._uses[id(session)] = 0
+        return session
+
+    def _is_healthy(self, session):
+        try:
+            return session.is_alive()
+        except Exception:
+            return False
+
+    def _discard(self, session):
+        with self._lock:
+            self._uses.pop(id(session), None)
+        self._release_slot()
+        try:
+            session.close()
+        except Exception as e:
+            logger.warning("Error closing scraper session: %s", e)
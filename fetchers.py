@@ -0,0 +1,211 @@
+import os
+import threading
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from ratelimit import HostRateLimiter
+
+DEFAULT_BASE_URL = os.environ.get("REDDIT_BASE_URL", "https://www.reddit.com")
+USER_AGENT = "python:reddit_bot.persona:v1.0 (persona analyzer)"
+
+# Shared by every backend so concurrent scrapes stay under Reddit's per-host limits.
+host_limiter = HostRateLimiter(
+    rate=float(os.environ.get("REDDIT_REQUESTS_PER_SECOND", "1")),
+    burst=int(os.environ.get("REDDIT_REQUEST_BURST", "5")),
+)
+
+
+class FetchError(Exception):
+    """Raised when a backend cannot serve a listing; ``status`` is the HTTP status if any."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class ResumePoint:
+    """
+    Decides item by item where an incremental listing starts and stops.
+
+    With ``after`` every item is skipped until that fullname has gone by, so
+    a listing can resume below the oldest stored item. After that the listing
+    stops at the first item in ``known_ids``. The exception is a known pinned
+    (stickied) item: profiles show pinned items first, out of date order, so
+    those are skipped instead of ending the re-scrape.
+    """
+
+    KEEP, SKIP, STOP = "keep", "skip", "stop"
+
+    def __init__(self, known_ids=None, after=None):
+        self.known_ids = known_ids or set()
+        self.after = after
+        self.waiting = after is not None
+
+    def check(self, item_id, pinned=False):
+        """KEEP, SKIP or STOP; ``pinned`` may be a callable, evaluated only for known items."""
+        if self.waiting:
+            if item_id == self.after:
+                self.waiting = False
+            return self.SKIP
+        if item_id and item_id in self.known_ids:
+            return self.SKIP if (pinned() if callable(pinned) else pinned) else self.STOP
+        return self.KEEP
+
+
+class Fetcher:
+    """
+    Interface shared by every way of getting a user's posts and comments.
+
+    Backends return the same dict shapes as RedditUserScraper:
+    posts are ``{"title", "content", "subreddit", "id"}`` and comments are
+    ``{"text", "subreddit", "id"}``, where ``id`` is the Reddit fullname (``t3_``/``t1_``).
+    Passing ``known_ids`` stops the listing at the first item already seen,
+    which is how incremental re-scrapes avoid walking the whole history, and
+    ``after`` (a fullname) returns only items listed below that one, which is
+    how a stored history is backfilled. ``on_progress(kind, count)`` is called
+    as items are found.
+    """
+
+    name = "base"
+
+    def fetch_posts(self, username, max_posts=30, known_ids=None, on_progress=None, after=None):
+        raise NotImplementedError
+
+    def fetch_comments(self, username, max_comments=50, known_ids=None, on_progress=None, after=None):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class HttpFetcher(Fetcher):
+    """
+    Browserless backend that reads Reddit's public ``.json`` listings.
+
+    Uses one pooled keep-alive ``requests.Session`` and follows the ``after``
+    cursor until enough items are collected. ``base_url`` can point at a
+    local stand-in server that serves recorded listing fixtures.
+    """
+
+    name = "http"
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, session=None, timeout=10, page_size=100, pool_size=10,
+                 rate_limiter=host_limiter):
+        self.base_url = base_url.rstrip("/")
+        self.host = urlparse(self.base_url).netloc
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.page_size = page_size
+        self.session = session or self._build_session(pool_size)
+
+    def fetch_posts(self, username, max_posts=30, known_ids=None, on_progress=None, after=None):
+        posts = []
+        for item in self._listing(f"/user/{username}/submitted.json", max_posts, known_ids, after):
+            posts.append(self.to_post(item))
+            if on_progress:
+                on_progress("posts", len(posts))
+        return posts
+
+    def fetch_comments(self, username, max_comments=50, known_ids=None, on_progress=None, after=None):
+        comments = []
+        for item in self._listing(f"/user/{username}/comments.json", max_comments, known_ids, after):
+            comment = self.to_comment(item)
+            if comment["text"] != "No text found":
+                comments.append(comment)
+                if on_progress:
+                    on_progress("comments", len(comments))
+        return comments
+
+    def close(self):
+        self.session.close()
+
+    @staticmethod
+    def to_post(item):
+        """Map a ``t3`` listing child to the scraper's post dict."""
+        return {
+            "title": (item.get("title") or "").strip() or "No title found",
+            "content": (item.get("selftext") or "").strip() or "No content found",
+            "subreddit": item.get("subreddit_name_prefixed") or "Unknown",
+            "id": item.get("name"),
+        }
+
+    @staticmethod
+    def to_comment(item):
+        """Map a ``t1`` listing child to the scraper's comment dict."""
+        return {
+            "text": (item.get("body") or "").strip() or "No text found",
+            "subreddit": item.get("subreddit_name_prefixed") or "Unknown",
+            "id": item.get("name"),
+        }
+
+    def _listing(self, path, limit, known_ids=None, after=None):
+        """
+        Yield up to ``limit`` child ``data`` dicts, following the ``after`` cursor
+        (starting below ``after`` if given). Stops at the first child whose
+        fullname is in ``known_ids``, skipping known pinned children.
+        """
+        point = ResumePoint(known_ids)
+        seen = 0
+        while seen < limit:
+            params = {"limit": min(self.page_size, limit - seen), "raw_json": 1}
+            if after:
+                params["after"] = after
+            payload = self._get(path, params)
+
+            data = payload.get("data") or {}
+            children = data.get("children") or []
+            for child in children:
+                item = child.get("data") or {}
+                action = point.check(item.get("name"), bool(item.get("pinned") or item.get("stickied")))
+                if action == point.STOP:
+                    return
+                if action == point.SKIP:
+                    continue
+                yield item
+                seen += 1
+                if seen >= limit:
+                    return
+
+            after = data.get("after")
+            if not after or not children:
+                return
+
+    def _get(self, path, params):
+        url = f"{self.base_url}{path}"
+        if self.rate_limiter:
+            self.rate_limiter.acquire(self.host)
+        try:
+            response = self.session.get(url, params=params, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise FetchError(f"Request to {url} failed: {e}") from e
+
+        if response.status_code != 200:
+            raise FetchError(f"{url} returned HTTP {response.status_code}", status=response.status_code)
+        try:
+            return response.json()
+        except ValueError as e:
+            raise FetchError(f"{url} did not return JSON") from e
+
+    @staticmethod
+    def _build_session(pool_size):
+        session = requests.Session()
+        session.headers.update({"User-Agent": USER_AGENT, "Accept": "application/json"})
+        retries = Retry(total=2, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504], allowed_methods=["GET"])
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+
+_http_fetcher = None
+_http_lock = threading.Lock()
+
+
+def get_http_fetcher():
+    """Return the process-wide HTTP fetcher so its connection pool is reused."""
+    global _http_fetcher
+    with _http_lock:
+        if _http_fetcher is None:
+            _http_fetcher = HttpFetcher()
+        return _http_fetcher
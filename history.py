@@ -0,0 +1,123 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+DEFAULT_HISTORY_PATH = os.environ.get("REDDIT_HISTORY_DB", "history.sqlite3")
+
+
+def item_key(item):
+    """Stable identity of a scraped item: its Reddit fullname, or a content hash if none was found."""
+    if item.get("id"):
+        return item["id"]
+    payload = json.dumps({k: v for k, v in item.items() if k != "id"}, sort_keys=True, ensure_ascii=False)
+    return "h_" + hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class HistoryStore:
+    """
+    Per-user history of every post and comment scraped so far.
+
+    Items are ranked newest-first in listing order. ``known_ids`` feeds the
+    fetchers so a re-scrape stops at the first item it has already seen, and
+    ``merge`` prepends the newly found items to the stored history (or, with
+    ``older``, appends items found below the oldest stored one).
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS items (
+                username TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                item_id TEXT NOT NULL,
+                rank INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                PRIMARY KEY (username, kind, item_id)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS items_rank ON items (username, kind, rank)")
+        self._conn.commit()
+
+    def known_ids(self, username, kind):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item_id FROM items WHERE username = ? AND kind = ?", (username.lower(), kind)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def merge(self, username, kind, new_items, older=False):
+        """
+        Store ``new_items`` (newest first) ahead of everything already known,
+        or behind it with ``older``. Returns the number of items that were actually new.
+        """
+        username = username.lower()
+        now = time.time()
+        with self._lock:
+            if older:
+                bottom = self._conn.execute(
+                    "SELECT COALESCE(MIN(rank), 1) FROM items WHERE username = ? AND kind = ?", (username, kind)
+                ).fetchone()[0]
+                ranks = [bottom - 1 - i for i in range(len(new_items))]
+            else:
+                top = self._conn.execute(
+                    "SELECT COALESCE(MAX(rank), 0) FROM items WHERE username = ? AND kind = ?", (username, kind)
+                ).fetchone()[0]
+                ranks = [top + len(new_items) - i for i in range(len(new_items))]
+            rows = [
+                (username, kind, item_key(item), rank, json.dumps(item, ensure_ascii=False), now)
+                for item, rank in zip(new_items, ranks)
+            ]
+            cursor = self._conn.executemany(
+                "INSERT OR IGNORE INTO items (username, kind, item_id, rank, payload, first_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+        return max(cursor.rowcount, 0)
+
+    def oldest_id(self, username, kind):
+        """Fullname of the oldest stored item that has one (the cursor to backfill from), or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT item_id FROM items WHERE username = ? AND kind = ? AND item_id GLOB 't[13]_*' "
+                "ORDER BY rank LIMIT 1",
+                (username.lower(), kind),
+            ).fetchone()
+        return row[0] if row else None
+
+    def items(self, username, kind, limit=None):
+        """Stored items for a user, newest first."""
+        query = "SELECT payload FROM items WHERE username = ? AND kind = ? ORDER BY rank DESC"
+        params = [username.lower(), kind]
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_history_store():
+    """Return the process-wide history store."""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = HistoryStore()
+        return _default_store
@@ -0,0 +1,225 @@
+import os
+import json
+import atexit
+import time
+import logging
+import threading
+from contextlib import contextmanager, nullcontext
+
+try:
+    import psutil
+except ImportError:  # optional: RSS falls back to /proc on Linux
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+
+def configure_logging(level=None):
+    """Set up leveled console logging for the app and CLI (REDDIT_LOG_LEVEL, default INFO)."""
+    level = level or os.environ.get("REDDIT_LOG_LEVEL", "INFO")
+    logging.basicConfig(level=level.upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+
+class JsonLogSink:
+    """Appends one JSON object per event to ``path``."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def record(self, event):
+        line = json.dumps(event, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def flush(self):
+        pass
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class PrometheusTextSink:
+    """
+    Aggregates events into Prometheus text exposition format and rewrites
+    ``path`` on ``flush`` (suitable for node_exporter's textfile collector).
+    Stage timings become ``_seconds_sum``/``_seconds_count`` pairs, numeric
+    span values become counters and gauges keep their last value.
+    """
+
+    PREFIX = "reddit_bot"
+
+    def __init__(self, path, flush_every=50):
+        self.path = path
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self._sums = {}
+        self._gauges = {}
+        self._pending = 0
+
+    def record(self, event):
+        labels = tuple(sorted((k, str(v)) for k, v in event.get("labels", {}).items()))
+        with self._lock:
+            if event["type"] == "gauge":
+                self._gauges[(event["name"], labels)] = event["value"]
+            else:
+                key = (event["name"], labels)
+                total, count = self._sums.get((key, "seconds"), (0.0, 0))
+                self._sums[(key, "seconds")] = (total + event["seconds"], count + 1)
+                for name, value in event.get("values", {}).items():
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        total, count = self._sums.get((key, name), (0.0, 0))
+                        self._sums[(key, name)] = (total + value, count + 1)
+            self._pending += 1
+            due = self._pending >= self.flush_every
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            self._pending = 0
+            lines = []
+            for ((stage, labels), unit), (total, count) in sorted(self._sums.items()):
+                metric = f"{self.PREFIX}_{stage}_{unit}"
+                label_text = self._labels(labels)
+                lines.append(f"{metric}_sum{label_text} {total}")
+                lines.append(f"{metric}_count{label_text} {count}")
+            for (name, labels), value in sorted(self._gauges.items()):
+                lines.append(f"{self.PREFIX}_{name}{self._labels(labels)} {value}")
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def close(self):
+        self.flush()
+
+    @staticmethod
+    def _labels(labels):
+        if not labels:
+            return ""
+        inner = ",".join(f'{k}="{v}"'.replace("\n", " ") for k, v in labels)
+        return "{" + inner + "}"
+
+
+class Instrumentation:
+    """
+    Stage timers and gauges fanned out to pluggable sinks.
+
+    With no sinks attached ``timer`` returns a ``nullcontext`` and ``gauge``
+    returns immediately, so instrumented code pays nothing when disabled.
+    """
+
+    def __init__(self, sinks=None):
+        self.sinks = list(sinks or [])
+
+    @property
+    def enabled(self):
+        return bool(self.sinks)
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    def timer(self, stage, **labels):
+        """
+        Time the ``with`` block as ``stage``. The block receives a dict it can
+        fill with extra numeric values (token counts, item counts, ...).
+        """
+        if not self.sinks:
+            return nullcontext({})
+        return self._timed(stage, labels)
+
+    def gauge(self, name, value, **labels):
+        if not self.sinks or value is None:
+            return
+        self._emit({"type": "gauge", "ts": time.time(), "name": name, "value": value, "labels": labels})
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+
+    @contextmanager
+    def _timed(self, stage, labels):
+        values = {}
+        started = time.perf_counter()
+        try:
+            yield values
+        except BaseException as e:
+            values["error"] = type(e).__name__
+            raise
+        finally:
+            self._emit({
+                "type": "timer",
+                "ts": time.time(),
+                "name": stage,
+                "seconds": time.perf_counter() - started,
+                "labels": labels,
+                "values": values,
+            })
+
+    def _emit(self, event):
+        for sink in self.sinks:
+            try:
+                sink.record(event)
+            except Exception:
+                logger.exception("Metrics sink %r failed", sink)
+
+
+def process_tree_rss(pid):
+    """Resident memory in bytes of ``pid`` plus all of its descendants, or None."""
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            processes = [root] + root.children(recursive=True)
+            return sum(process.memory_info().rss for process in processes if process.is_running())
+        except psutil.Error:
+            return None
+
+    # /proc fallback: walk the parent links of every process once.
+    try:
+        children = {}
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat", "r") as f:
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except OSError:  # exited while we were listing
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+        page_size = os.sysconf("SC_PAGE_SIZE")
+        total, stack = 0, [pid]
+        while stack:
+            current = stack.pop()
+            with open(f"/proc/{current}/statm", "r") as f:
+                total += int(f.read().split()[1]) * page_size
+            stack.extend(children.get(current, []))
+        return total
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def browser_rss(driver):
+    """RSS of the chromedriver process and every Chrome process it started."""
+    try:
+        return process_tree_rss(driver.service.process.pid)
+    except AttributeError:
+        return None
+
+
+def configure_from_env():
+    """Build the default instrumentation from REDDIT_METRICS_JSON / REDDIT_METRICS_PROM."""
+    instrumentation = Instrumentation()
+    if os.environ.get("REDDIT_METRICS_JSON"):
+        instrumentation.add_sink(JsonLogSink(os.environ["REDDIT_METRICS_JSON"]))
+    if os.environ.get("REDDIT_METRICS_PROM"):
+        instrumentation.add_sink(PrometheusTextSink(os.environ["REDDIT_METRICS_PROM"]))
+    if instrumentation.enabled:
+        atexit.register(instrumentation.flush)
+    return instrumentation
+
+
+metrics = configure_from_env()
@@ -0,0 +1,93 @@
+import os
+
+# Lean mode is on unless REDDIT_LEAN_BROWSER=0; the scraper only ever reads text.
+LEAN_BROWSER = os.environ.get("REDDIT_LEAN_BROWSER", "1") != "0"
+
+LEAN_WINDOW_SIZE = os.environ.get("REDDIT_WINDOW_SIZE", "1280,900")
+
+# Requests the scraper never needs: images, video, fonts, ads and analytics.
+# Wildcards follow DevTools' Network.setBlockedURLs syntax.
+BLOCKED_URL_PATTERNS = [
+    # media and fonts, with or without a query string
+    "*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.avif*", "*.ico*",
+    "*.mp4*", "*.webm*", "*.m3u8*", "*.mpd*",
+    "*.woff*", "*.ttf*", "*.otf*",
+    # Reddit's image/video CDNs, avatars and emoji
+    "*i.redd.it/*", "*v.redd.it/*", "*preview.redd.it/*", "*external-preview.redd.it/*",
+    "*styles.redditmedia.com/*", "*thumbs.redditmedia.com/*", "*emoji.redditmedia.com/*",
+    "*www.redditstatic.com/avatars/*",
+    # ads, telemetry and third-party scripts
+    "*alb.reddit.com/*", "*events.reddit.com/*", "*w3-reporting.reddit.com/*",
+    "*error-tracking.reddit.com/*", "*pixel.redditmedia.com/*",
+    "*doubleclick.net/*", "*googlesyndication.com/*", "*googletagmanager.com/*",
+    "*google-analytics.com/*", "*googletagservices.com/*", "*amazon-adsystem.com/*",
+    "*adsafeprotected.com/*", "*moatads.com/*", "*scorecardresearch.com/*",
+]
+
+# Content settings: 2 = block.
+LEAN_PREFS = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.default_content_setting_values.notifications": 2,
+    "profile.default_content_setting_values.geolocation": 2,
+    "profile.default_content_setting_values.media_stream": 2,
+    "profile.managed_default_content_settings.plugins": 2,
+}
+
+LEAN_ARGUMENTS = [
+    "--blink-settings=imagesEnabled=false",
+    "--autoplay-policy=user-gesture-required",
+    "--mute-audio",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--no-first-run",
+    # Fewer, smaller renderers: one site per scraper needs no isolation between tabs.
+    "--renderer-process-limit=1",
+    "--disable-site-isolation-trials",
+    "--js-flags=--max-old-space-size=256",
+]
+
+# Transfer size of the document and every subresource the page loaded.
+# Cross-origin entries without Timing-Allow-Origin report 0 bytes, so the
+# byte count is a lower bound; the request count is exact.
+PAGE_WEIGHT_SCRIPT = """
+const entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+const navigation = performance.getEntriesByType('navigation')[0];
+let bytes = 0;
+for (const entry of entries) bytes += entry.transferSize || 0;
+return {
+    requests: entries.length,
+    transfer_bytes: bytes,
+    dom_content_loaded_ms: navigation ? Math.round(navigation.domContentLoadedEventEnd) : null,
+};
+"""
+
+
+def apply_lean_options(options, window_size=LEAN_WINDOW_SIZE):
+    """Configure Chrome ``options`` for text-only scraping."""
+    options.page_load_strategy = "eager"
+    options.add_experimental_option("prefs", LEAN_PREFS)
+    options.add_argument(f"--window-size={window_size}")
+    for argument in LEAN_ARGUMENTS:
+        options.add_argument(argument)
+    return options
+
+
+def block_urls(driver, patterns=BLOCKED_URL_PATTERNS):
+    """Install the URL blocklist through DevTools; returns False if the driver has no CDP."""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+        return True
+    except Exception:
+        return False
+
+
+def page_weight(driver):
+    """Requests, transferred bytes and DOMContentLoaded time of the current page, or None."""
+    try:
+        return driver.execute_script(PAGE_WEIGHT_SCRIPT)
+    except Exception:
+        return None
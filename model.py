@@ -1,45 +1,286 @@
+import os
+import re
 import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import google.generativeai as genai
 from scrap import main    
+from async_scrape import run, scrape_user
+from persona_cache import get_persona_cache, persona_key
+from corpus import DEFAULT_TOKEN_BUDGET, build_corpus, estimate_tokens, shard_corpus
+from instrumentation import metrics
+from ratelimit import RateLimiter
+from singleflight import SingleFlight, get_job_queue
+from archive import get_archive
+
+try:
+    from google.api_core.exceptions import ResourceExhausted
+except ImportError:
+    ResourceExhausted = None
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "gemini-1.5-flash-latest"
+
+# Bump whenever a prompt below changes so cached personas are not reused.
+PROMPT_VERSION = "5"
+
+# How many shard prompts may be in flight at once for map-reduce personas.
+MAP_CONCURRENCY = int(os.environ.get("REDDIT_MAP_CONCURRENCY", "4"))
+
+# Gemini requests per minute for the whole process, shared by every analyzer and thread.
+GEMINI_RPM = float(os.environ.get("REDDIT_GEMINI_RPM", "60"))
+gemini_limiter = RateLimiter(GEMINI_RPM / 60, burst=int(os.environ.get("REDDIT_GEMINI_BURST", "5")))
+
+# Retries after a 429, waiting GEMINI_BACKOFF, 2x, 4x, ... seconds.
+GEMINI_RETRIES = 4
+GEMINI_BACKOFF = 2.0
+
+# Concurrent callers for the same user share one scrape and one persona build.
+scrape_flight = SingleFlight()
+persona_flight = SingleFlight()
+
+FACET_PROMPTS = {
+    "goals": "Give me a list of the goals and aspirations of the user based on the posts and comments.",
+    "frustrations": "Give me a list of the frustrations and challenges of the user based on the posts and comments.",
+    "interests": "Give me a list of the interests and hobbies of the user based on the posts and comments.",
+    "motivations": "Give me a list of the motivations along with the percentage of motivations of the user based on the posts and comments.",
+    "fears": "Give me a list of the fears and concerns of the user based on the posts and comments.",
+}
+
+PERSONA_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        facet: {"type": "ARRAY", "items": {"type": "STRING"}} for facet in FACET_PROMPTS
+    },
+    "required": list(FACET_PROMPTS),
+}
+
+STRUCTURED_CONFIG = {"response_mime_type": "application/json", "response_schema": PERSONA_SCHEMA}
+
+_json_decoder = json.JSONDecoder()
+
+_models = {}
+_models_key = None
+_models_lock = threading.Lock()
+
+def get_model(api_key: str, model_name: str = MODEL_NAME):
+    """
+    Return the process-wide Gemini client for `model_name`, so analyzers can be created cheaply.
+
+    `genai.configure` sets a single API key for the whole process, so clients are
+    cached per model only. The SDK is configured again only when the key changes,
+    and from then on every Gemini call in the process uses the new key.
+    """
+    global _models_key
+    api_key = (api_key or "").strip()
+    if not api_key:
+        raise ValueError("API key is required. Please set the API key before using the model.")
+    with _models_lock:
+        if api_key != _models_key:
+            genai.configure(api_key=api_key)
+            _models_key = api_key
+        model = _models.get(model_name)
+        if model is None:
+            model = _models[model_name] = genai.GenerativeModel(model_name)
+        return model
+
+def _rate_limited(error) -> bool:
+    if ResourceExhausted is not None and isinstance(error, ResourceExhausted):
+        return True
+    return "429" in str(error)
+
+def _findings(items) -> list:
+    """Non-empty findings as stripped strings, at most 10."""
+    return [str(item).strip() for item in items if str(item).strip()][:10]
+
+def _back_off(attempt: int, call: str):
+    """Slow every Gemini caller down after a 429, not just the one that hit it."""
+    delay = GEMINI_BACKOFF * 2 ** attempt
+    logger.warning("Gemini rate limit hit (%s call); backing off %.1fs", call, delay)
+    gemini_limiter.pause(delay)
 
 class RedditPersonaAnalyzer:
     """
     Encapsulates loading a user’s Reddit data, configuring Gemini,
     generating structured responses, and packaging results.
+
+    Construction is cheap: the data is loaded on first use of `posts`/`comments`
+    (or an explicit `load()`), either from the injected `posts`/`comments`, from
+    `fetcher` (a `fetchers.Fetcher` such as `HttpFetcher`, asked for `max_posts`
+    and `max_comments`) or by scraping, and the Gemini client is shared.
+
+    Analyzers for the same user in one process share work: concurrent loads wait
+    on a single scrape, queued on the shared job queue at `priority` (lower runs
+    first), and concurrent persona builds wait on a single set of Gemini calls.
     """
 
-    def __init__(self, username: str, api_key: str):
+    def __init__(self, username: str, api_key: str = None, model=None, cache=None, token_budget: int = DEFAULT_TOKEN_BUDGET,
+                 max_posts: int = 20, max_comments: int = 30, max_concurrency: int = MAP_CONCURRENCY,
+                 on_progress=None, posts=None, comments=None, fetcher=None, priority: int = 0):
         self.username = username
-        self.api_key = api_key.strip()
+        self.api_key = (api_key or "").strip()
+        self.cache = cache or get_persona_cache()
+        self.token_budget = token_budget
+        self.max_posts = max_posts
+        self.max_comments = max_comments
+        self.max_concurrency = max_concurrency
+        self.on_progress = on_progress
+        self.fetcher = fetcher
+        self.priority = priority
+        self._corpus = None
+        self._load_lock = threading.Lock()
+        self._data = None
+        if posts is not None or comments is not None:
+            self._data = (posts or [], comments or [])
 
-        if not self.api_key:
+        if model is None and not self.api_key:
             raise ValueError("API key is required. Please set the API key before using the model.")
+        self._model = model
+
+    @classmethod
+    def from_archive(cls, username: str, archive=None, **kwargs):
+        """
+        Analyzer over the user's latest archived scrape, for re-running personas
+        after a prompt or model change without opening a browser.
+        Raises ValueError if the user was never archived.
+        """
+        snapshot = (archive or get_archive()).latest(username)
+        if snapshot is None:
+            raise ValueError(f"No archived scrape for u/{username}.")
+        posts, comments, _ = snapshot
+        return cls(username, posts=posts, comments=comments, **kwargs)
 
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel("gemini-1.5-flash-latest")
-        self.posts, self.comments = self._load_data()
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = get_model(self.api_key)
+        return self._model
 
+    @property
+    def loaded(self) -> bool:
+        return self._data is not None
+
+    @property
+    def posts(self):
+        return self.load()[0]
+
+    @property
+    def comments(self):
+        return self.load()[1]
+
+    def load(self):
+        """Load (posts, comments) once; later calls return the same data."""
+        if self._data is None:
+            with self._load_lock:
+                if self._data is None:
+                    self._data = self._load_data()
+        return self._data
 
     def _load_data(self):
-        posts, comments = main(self.username)
+        cached = self.cache.get_scrape(self.username, self.max_posts, self.max_comments)
+        if cached is not None:
+            return cached
+
+        key = (self.username.strip().lower(), self.max_posts, self.max_comments, self.fetcher)
+        flight, leader = scrape_flight.begin(key, self.on_progress)
+        if not leader:
+            get_job_queue().promote(key, self.priority)
+            return flight.wait()
+        try:
+            data = get_job_queue().submit(self._scrape, flight.notify, priority=self.priority, key=key).result()
+        except BaseException as e:
+            scrape_flight.end(key, flight, error=e)
+            raise
+        scrape_flight.end(key, flight, result=data)
+        return data
+
+    def _scrape(self, on_progress):
+        """Runs on the job queue; `on_progress` reports to every analyzer waiting on this scrape."""
+        # A scrape that finished while this one was queued may already have filled the cache.
+        cached = self.cache.get_scrape(self.username, self.max_posts, self.max_comments)
+        if cached is not None:
+            return cached
+        if self.fetcher is not None:
+            listings = {"posts": self.fetcher.fetch_posts, "comments": self.fetcher.fetch_comments}
+            posts, comments = run(scrape_user(
+                self.username,
+                lambda kind, username, limit: listings[kind](username, limit, on_progress=on_progress),
+                self.max_posts,
+                self.max_comments,
+            ))
+        else:
+            posts, comments = main(
+                self.username, max_posts=self.max_posts, max_comments=self.max_comments, on_progress=on_progress
+            )
+        if posts or comments:
+            self.cache.set_scrape(self.username, posts, comments, self.max_posts, self.max_comments)
         return posts, comments
 
+    @property
+    def corpus(self):
+        """Deduplicated, budgeted text of the user's posts and comments (built once)."""
+        if self._corpus is None:
+            self._corpus = build_corpus(self.posts, self.comments, self.token_budget)
+            logger.info("Prompt corpus: %s", self._corpus.report())
+        return self._corpus
+
+    def _context(self, text: str = None) -> str:
+        """Instructions and user data shared by every prompt; `text` overrides the corpus (e.g. one shard)."""
+        activity = ""
+        if self.corpus.summary:
+            activity = f"""
+        The user's history is long, so the items below are a representative sample
+        covering each of their recurring topics. Activity across the whole history:
+{self.corpus.summary}
+"""
+        return f"""
+        You are a helpful assistant, your task is first to study the following text
+        and then answer the question based on the text.
+        The text I will provide is the posts and comments of a social media platform, Reddit.
+        Each line is one item: lines starting with P are posts (title | body),
+        lines starting with C are comments; the subreddit follows the letter when known.
+{activity}
+        The posts and comments are as follows:
+        {self.corpus.text if text is None else text}
+        """
+
     def _generate_response(self, prompt: str) -> str:
         """
         Feed posts + comments into Gemini with the caller‑supplied question.
         Returns raw text from the model (stripped).
         """
-        full_prompt = f"""
-        You are a helpful assistant, your task is first to study the following text
-        and then answer the question based on the text.
-        The text I will provide is the posts and comments of a social media platform, Reddit.
-        The text is in the form of a list of dictionaries.
-        Each dictionary contains different fields of the post or comment.
-        If the value of a field is Unknown it means that the field is not available.
+        response = self._generate(self._facet_prompt(prompt), "facet")
+        return response.text.strip()
 
-        The posts and comments are as follows:
-        {self.posts}, {self.comments}
+    def _generate(self, prompt, call, **kwargs):
+        """
+        generate_content timed as one LLM call, with the prompt/response token counts it reports.
+        Paced by `gemini_limiter` and retried with backoff when Gemini answers 429.
+        """
+        for attempt in range(GEMINI_RETRIES + 1):
+            gemini_limiter.acquire()
+            try:
+                with metrics.timer("llm_call", call=call) as span:
+                    response = self.model.generate_content(prompt, **kwargs)
+                    self._record_usage(span, response)
+                return response
+            except Exception as e:
+                if attempt == GEMINI_RETRIES or not _rate_limited(e):
+                    raise
+                _back_off(attempt, call)
 
+    @staticmethod
+    def _record_usage(span, response):
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            span["prompt_tokens"] = getattr(usage, "prompt_token_count", 0) or 0
+            span["response_tokens"] = getattr(usage, "candidates_token_count", 0) or 0
+
+    def _facet_prompt(self, prompt: str) -> str:
+        """Full prompt for a single facet question."""
+        return f"""{self._context()}
         {prompt}
         return the response in a list format,
         do not include any explanation or additional text; each element of the list should be
@@ -48,25 +289,238 @@ class RedditPersonaAnalyzer:
         each element of the list should be a single line or two lines at most,
         give me a max of 10 elements in the list,
         """
-        response = self.model.generate_content(full_prompt)
-        return response.text.strip()
 
-    def build_persona(self) -> dict:
+    def _structured_prompt(self, text: str = None) -> str:
+        """Full prompt asking for all five facets as one JSON object."""
+        questions = "\n".join(f"        - {facet}: {prompt}" for facet, prompt in FACET_PROMPTS.items())
+        return f"""{self._context(text)}
+        Answer each of the following questions about the user:
+{questions}
+
+        Return a single JSON object with exactly the keys {", ".join(FACET_PROMPTS)}.
+        Each value must be a list of strings; each string is a single behavior or habit of the user,
+        one or two lines at most, without numbers or bullet points.
+        Give a max of 10 elements per list and do not include any other text.
+        """
+
+    def _generate_structured(self, text: str = None) -> dict:
+        """
+        Ask for all five facets in one call, constrained to PERSONA_SCHEMA.
+        Raises ValueError if the response is not a well-formed persona.
+        """
+        response = self._generate(self._structured_prompt(text), "structured", generation_config=STRUCTURED_CONFIG)
+        return self._parse_persona(response.text)
+
+    @staticmethod
+    def _parse_persona(text: str) -> dict:
+        """Validate a JSON persona and normalise it to lists of non-empty strings."""
+        # Tolerate a markdown code fence around the JSON.
+        text = re.sub(r"^\s*```(?:json)?\s*|\s*```\s*$", "", text or "")
+        data = json.loads(text)
+        if not isinstance(data, dict):
+            raise ValueError("Persona response is not a JSON object")
+
+        persona = {}
+        for facet in FACET_PROMPTS:
+            items = data.get(facet)
+            if not isinstance(items, list):
+                raise ValueError(f"Persona response is missing the '{facet}' list")
+            persona[facet] = _findings(items)
+        return persona
+
+    @staticmethod
+    def _complete_facets(text: str, done) -> dict:
+        """Facets (other than those in `done`) whose JSON list is already complete in a partial response."""
+        complete = {}
+        for facet in FACET_PROMPTS:
+            match = None if facet in done else re.search(rf'"{facet}"\s*:\s*', text)
+            if match is None:
+                continue
+            try:
+                items, _ = _json_decoder.raw_decode(text, match.end())
+            except ValueError:
+                continue
+            if isinstance(items, list):
+                complete[facet] = _findings(items)
+        return complete
+
+    def _build_persona_parallel(self, facets=None) -> dict:
+        """One prompt per facet (all five unless `facets` is given), all in flight at once."""
+        with ThreadPoolExecutor(max_workers=len(FACET_PROMPTS)) as executor:
+            futures = {
+                facet: executor.submit(self._generate_response, FACET_PROMPTS[facet])
+                for facet in facets or FACET_PROMPTS
+            }
+            return {facet: future.result().split("\n") for facet, future in futures.items()}
+
+    def _build_persona_map_reduce(self) -> dict:
+        """
+        Map: extract all five facets from each token-sized shard of the selected items,
+        at most `max_concurrency` shards at a time. Reduce: merge the findings.
+        """
+        # Every shard prompt also carries the activity summary of the whole history.
+        budget = self.token_budget - (estimate_tokens(self.corpus.summary) + 1 if self.corpus.summary else 0)
+        shards = shard_corpus(self.corpus.selected, budget)
+        logger.info("Map-reduce persona over %d shards", len(shards))
+
+        partials = []
+        with ThreadPoolExecutor(max_workers=max(1, self.max_concurrency)) as executor:
+            for future in [executor.submit(self._generate_structured, shard) for shard in shards]:
+                try:
+                    partials.append(future.result())
+                except ValueError as e:
+                    logger.warning("Skipping a shard with a malformed response: %s", e)
+
+        if not partials:
+            raise ValueError("No shard produced a usable persona")
+        return self._reduce_findings(partials)
+
+    def _reduce_findings(self, partials: list) -> dict:
+        """
+        Merge per-shard personas: exact duplicates are collapsed and findings seen in
+        more shards rank first; the model then condenses each facet to at most 10 items.
+        Falls back to the locally merged lists if that response is malformed.
+        """
+        merged = {}
+        for facet in FACET_PROMPTS:
+            counts, first_seen = {}, {}
+            for partial in partials:
+                for finding in partial.get(facet, []):
+                    norm = " ".join(re.findall(r"\w+", finding.lower()))
+                    if norm:
+                        counts[norm] = counts.get(norm, 0) + 1
+                        first_seen.setdefault(norm, finding)
+            ranked = sorted(counts, key=lambda norm: counts[norm], reverse=True)
+            merged[facet] = [first_seen[norm] for norm in ranked]
+
+        if len(partials) == 1 or all(len(findings) <= 10 for findings in merged.values()):
+            return {facet: findings[:10] for facet, findings in merged.items()}
+
+        full_prompt = f"""
+        The following JSON holds findings about one Reddit user, extracted separately
+        from different parts of their post and comment history:
+        {json.dumps(merged, ensure_ascii=False)}
+
+        Merge them into a single persona: combine findings that say the same thing,
+        prefer findings that recur, and drop contradictions that are weakly supported.
+        Return a single JSON object with exactly the keys {", ".join(FACET_PROMPTS)}.
+        Each value must be a list of at most 10 strings, one or two lines each,
+        without numbers or bullet points, and do not include any other text.
+        """
+        try:
+            response = self._generate(full_prompt, "reduce", generation_config=STRUCTURED_CONFIG)
+            return self._parse_persona(response.text)
+        except ValueError as e:
+            logger.warning("Reduce response was malformed (%s); using locally merged findings", e)
+            return {facet: findings[:10] for facet, findings in merged.items()}
+
+    def build_persona(self, single_call: bool = True) -> dict:
         """Return the composite dictionary of goals, frustrations, interests, motivations, and fears."""
-        return {
-            "goals": self._generate_response(
-                "Give me a list of the goals and aspirations of the user based on the posts and comments."
-            ).split("\n"),
-            "frustrations": self._generate_response(
-                "Give me a list of the frustrations and challenges of the user based on the posts and comments."
-            ).split("\n"),
-            "interests": self._generate_response(
-                "Give me a list of the interests and hobbies of the user based on the posts and comments."
-            ).split("\n"),
-            "motivations": self._generate_response(
-                "Give me a list of the motivations along with the percentage of motivations of the user based on the posts and comments."
-            ).split("\n"),
-            "fears": self._generate_response(
-                "Give me a list of the fears and concerns of the user based on the posts and comments."
-            ).split("\n"),
-        }
+        key = persona_key(self.posts, self.comments, MODEL_NAME, f"{PROMPT_VERSION}:{self.token_budget}")
+        persona = self.cache.get(key)
+        if persona is not None:
+            return persona
+        return persona_flight.do(key, lambda notify: self._build_persona(key, single_call))
+
+    def _build_persona(self, key: str, single_call: bool) -> dict:
+        # Another flight for this key may have finished since build_persona looked.
+        persona = self.cache.get(key)
+        if persona is not None:
+            return persona
+
+        stats = self.corpus.stats
+        if stats["items_kept"] < stats["items_selected"]:
+            # Even the (representative) selection does not fit one prompt; analyse all of it in shards.
+            try:
+                persona = self._build_persona_map_reduce()
+            except ValueError as e:
+                logger.warning("Map-reduce persona failed (%s); using the budgeted corpus instead", e)
+        if persona is None and single_call:
+            try:
+                persona = self._generate_structured()
+            except ValueError as e:
+                logger.warning("Structured persona response was malformed (%s); falling back to per-facet prompts", e)
+        if persona is None:
+            persona = self._build_persona_parallel()
+
+        self.cache.set(key, persona)
+        return persona
+
+    def stream_persona(self):
+        """
+        Yield (facet, text) pairs as each facet becomes available. The persona comes
+        from one streamed structured call, and a facet is yielded as soon as its list
+        is complete. Users that need map-reduce get build_persona's result replayed
+        facet by facet. The persona is cached like build_persona's, and callers
+        that arrive while it is being built get it whole once it is done.
+        """
+        key = persona_key(self.posts, self.comments, MODEL_NAME, f"{PROMPT_VERSION}:{self.token_budget}")
+        persona = self.cache.get(key)
+        if persona is None:
+            flight, leader = persona_flight.begin(key)
+            if not leader:
+                persona = flight.wait()
+            else:
+                stats = self.corpus.stats
+                if stats["items_kept"] < stats["items_selected"]:
+                    # Shards cannot be streamed usefully; build in full, then replay below.
+                    try:
+                        persona = self._build_persona(key, single_call=True)
+                    except BaseException as e:
+                        persona_flight.end(key, flight, error=e)
+                        raise
+                    persona_flight.end(key, flight, result=persona)
+                else:
+                    try:
+                        persona = yield from self._stream_structured()
+                        self.cache.set(key, persona)
+                    except BaseException as e:
+                        # GeneratorExit etc. must not be re-raised in the followers' threads.
+                        error = e if isinstance(e, Exception) else RuntimeError("Persona stream was abandoned")
+                        persona_flight.end(key, flight, error=error)
+                        raise
+                    persona_flight.end(key, flight, result=persona)
+                    return
+        for facet, findings in persona.items():
+            yield facet, "\n".join(findings)
+
+    def _stream_structured(self):
+        """
+        Stream the single structured call, yielding each facet once its JSON list is
+        complete; returns the assembled persona. If the response turns out malformed,
+        the facets not yet shown are asked for with per-facet prompts.
+        """
+        text, shown = "", {}
+        for attempt in range(GEMINI_RETRIES + 1):
+            gemini_limiter.acquire()
+            chunk = None
+            try:
+                with metrics.timer("llm_call", call="stream") as span:
+                    for chunk in self.model.generate_content(
+                        self._structured_prompt(), generation_config=STRUCTURED_CONFIG, stream=True
+                    ):
+                        text += chunk.text
+                        for facet, findings in self._complete_facets(text, shown).items():
+                            shown[facet] = findings
+                            yield facet, "\n".join(findings)
+                    # The last chunk carries the totals for the whole stream.
+                    self._record_usage(span, chunk)
+                break
+            except Exception as e:
+                # Once text has been shown, a retry would repeat it.
+                if chunk is not None or attempt == GEMINI_RETRIES or not _rate_limited(e):
+                    raise
+                _back_off(attempt, "stream")
+
+        try:
+            persona = self._parse_persona(text)
+        except ValueError as e:
+            logger.warning("Streamed persona response was malformed (%s); falling back to per-facet prompts", e)
+            persona = dict(shown)
+            missing = [facet for facet in FACET_PROMPTS if facet not in shown]
+            if missing:
+                persona.update(self._build_persona_parallel(missing))
+        for facet in FACET_PROMPTS:
+            if facet not in shown:
+                yield facet, "\n".join(persona[facet])
+        return {facet: persona[facet] for facet in FACET_PROMPTS}
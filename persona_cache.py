@@ -0,0 +1,269 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+DEFAULT_DB_PATH = os.environ.get("REDDIT_CACHE_DB", "persona_cache.sqlite3")
+SCRAPE_TTL = int(os.environ.get("REDDIT_SCRAPE_TTL", str(6 * 3600)))
+
+
+class LRUCache:
+    """Small thread-safe in-process LRU with optional per-entry expiry."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.time():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+class SQLiteCache:
+    """
+    On-disk key/value store in a single SQLite file.
+
+    Values are JSON-encoded. Entries expire after their TTL, and once the
+    total stored size exceeds ``max_bytes`` the least recently used entries
+    are evicted.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, max_bytes=200 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, with_expiry=False):
+        """Return the stored value (and its expiry timestamp if ``with_expiry``), or None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] <= now):
+                if row is not None:
+                    self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        value = json.loads(row[0])
+        return (value, row[1]) if with_expiry else value
+
+    def set(self, key, value, ttl=None):
+        encoded = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, encoded, len(encoded), now + ttl if ttl else None, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+            total = self.hits + self.misses
+            return {
+                "entries": entries,
+                "bytes": size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self, now):
+        expired = self._conn.execute(
+            "DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+        ).rowcount
+        self.evictions += max(expired, 0)
+
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM cache ORDER BY accessed_at").fetchall():
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+class PersonaCache:
+    """
+    Two-tier cache for scrape results and generated personas.
+
+    Reads go to the in-process LRU first and then to SQLite (promoting hits
+    back into memory). Scrape results are keyed per username with a TTL and
+    remember the limits they were scraped with;
+    personas are keyed by a hash of the normalised data, the model name and
+    the prompt version, so they never go stale on their own.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, memory_entries=256, max_bytes=200 * 1024 * 1024, scrape_ttl=SCRAPE_TTL):
+        self.memory = LRUCache(memory_entries)
+        self.disk = SQLiteCache(path, max_bytes=max_bytes)
+        self.scrape_ttl = scrape_ttl
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        found = self.disk.get(key, with_expiry=True)
+        if found is None:
+            return None
+        value, expires_at = found
+        self.memory.set(key, value, ttl=expires_at - time.time() if expires_at else None)
+        return value
+
+    def set(self, key, value, ttl=None):
+        self.memory.set(key, value, ttl)
+        self.disk.set(key, value, ttl)
+
+    def get_scrape(self, username, max_posts=None, max_comments=None):
+        """
+        Cached ``(posts, comments)``, or None. A scrape made with smaller limits
+        than requested is a miss; one made with larger limits is cut down to the
+        newest ``max_posts``/``max_comments`` items (None takes them all).
+        """
+        value = self.get(scrape_key(username))
+        # Entries written before the limits were stored hold only [posts, comments].
+        if value is None or len(value) != 4:
+            return None
+        posts, comments, scraped_posts, scraped_comments = value
+        posts = _limit(posts, scraped_posts, max_posts)
+        comments = _limit(comments, scraped_comments, max_comments)
+        if posts is None or comments is None:
+            return None
+        return posts, comments
+
+    def set_scrape(self, username, posts, comments, max_posts, max_comments):
+        self.set(scrape_key(username), [posts, comments, max_posts, max_comments], ttl=self.scrape_ttl)
+
+    def stats(self):
+        return {"memory": self.memory.stats(), "disk": self.disk.stats()}
+
+
+def scrape_key(username):
+    return f"scrape:{username.strip().lower()}"
+
+
+def _limit(items, scraped_limit, limit):
+    """
+    ``items`` scraped with ``scraped_limit`` cut down to ``limit``, or None if
+    that scrape could not have seen enough. Listings may be JSON strings (as
+    main() returns them); those are parsed only when they need cutting.
+    """
+    if limit is None or scraped_limit == limit:
+        return items
+    if scraped_limit < limit:
+        return None
+    items = _normalise(items)
+    return items[:limit] if isinstance(items, list) else None
+
+
+def _normalise(data):
+    """Parse JSON strings so formatting differences do not change the hash."""
+    if not data:
+        return []
+    if isinstance(data, str):
+        try:
+            data = json.loads(data)
+        except ValueError:
+            return data.strip()
+    return data
+
+
+def persona_key(posts, comments, model_name, prompt_version):
+    """Content address for a persona: same data + model + prompts give the same key."""
+    payload = json.dumps(
+        [_normalise(posts), _normalise(comments), model_name, prompt_version],
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return "persona:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_persona_cache():
+    """Return the process-wide cache shared by every analyzer and Streamlit session."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = PersonaCache()
+        return _default_cache
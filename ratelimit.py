@@ -0,0 +1,94 @@
+import time
+import threading
+import multiprocessing
+
+
+class RateLimiter:
+    """Thread-safe token bucket: ``rate`` permits per second with bursts up to ``burst``."""
+
+    def __init__(self, rate, burst=1):
+        if rate <= 0:
+            raise ValueError("Rate must be positive.")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a permit and return how many seconds the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def pause(self, seconds):
+        """Hold back every caller for at least ``seconds``, e.g. after the server says to slow down."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate, -seconds * self.rate)
+            self._updated = now
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+        return delay
+
+
+class SharedRateLimiter(RateLimiter):
+    """
+    ``RateLimiter`` whose bucket lives in shared memory, so processes started
+    with it (e.g. through a pool initializer) draw from one budget. It can only
+    be handed to a child process when that process is created.
+    """
+
+    def __init__(self, rate, burst=1):
+        self._state = multiprocessing.Array("d", 2)
+        super().__init__(rate, burst)
+        self._lock = self._state.get_lock()
+
+    @property
+    def _tokens(self):
+        return self._state[0]
+
+    @_tokens.setter
+    def _tokens(self, value):
+        self._state[0] = value
+
+    @property
+    def _updated(self):
+        return self._state[1]
+
+    @_updated.setter
+    def _updated(self, value):
+        self._state[1] = value
+
+
+class HostRateLimiter:
+    """One ``RateLimiter`` per host, created on first use with the same settings."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def for_host(self, host):
+        with self._lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                limiter = self._limiters[host] = RateLimiter(self.rate, self.burst)
+            return limiter
+
+    def install(self, host, limiter):
+        """Use ``limiter`` for ``host`` instead of a limiter private to this process."""
+        with self._lock:
+            self._limiters[host] = limiter
+
+    def acquire(self, host):
+        return self.for_host(host).acquire()
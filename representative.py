@@ -0,0 +1,177 @@
+import os
+import zlib
+from collections import Counter
+from itertools import chain
+import numpy as np
+
+from corpus import STOPWORDS, WORD_RE
+
+# Hashed feature space: wide enough to keep topics apart, small enough that
+# 10k items fit in a few tens of MB and k-means is a handful of matmuls.
+N_FEATURES = 512
+REPRESENTATIVE_ITEMS = int(os.environ.get("REDDIT_REPRESENTATIVE_ITEMS", "120"))
+MAX_CLUSTERS = 30
+
+
+def _terms(text):
+    return [word for word in WORD_RE.findall(text.casefold()) if word not in STOPWORDS and len(word) > 2]
+
+
+def vectorize(texts, n_features=N_FEATURES):
+    """
+    L2-normalised TF-IDF rows over hashed term features.
+
+    Returns ``(matrix, feature_terms)`` where ``feature_terms[j]`` is the most
+    frequent term hashed to column ``j`` (for labelling clusters).
+    """
+    documents = [_terms(text) for text in texts]
+    term_counts = Counter(chain.from_iterable(documents))
+    # Hash each distinct term once, not every occurrence.
+    columns = {term: zlib.crc32(term.encode("utf-8")) % n_features for term in term_counts}
+
+    n = len(texts)
+    rows = np.repeat(np.arange(n, dtype=np.int64), [len(terms) for terms in documents])
+    cols = np.fromiter((columns[term] for term in chain.from_iterable(documents)), dtype=np.int64, count=len(rows))
+    flat = rows * n_features + cols
+    counts = np.bincount(flat, minlength=n * n_features).reshape(n, n_features).astype(np.float32)
+
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + n) / (1 + document_frequency)).astype(np.float32) + 1
+    matrix = np.log1p(counts) * idf
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix /= np.where(norms == 0, 1, norms)
+
+    feature_terms = [""] * n_features
+    best = [0] * n_features
+    for term, column in columns.items():
+        if term_counts[term] > best[column]:
+            best[column], feature_terms[column] = term_counts[term], term
+    return matrix, feature_terms
+
+
+def kmeans(matrix, k, iterations=12, seed=0, init_sample=2000):
+    """
+    Lloyd iterations on unit rows, seeded with k-means++ on a random sample of
+    at most ``init_sample`` rows; returns ``(labels, centroids)``.
+    """
+    rng = np.random.default_rng(seed)
+    n = matrix.shape[0]
+    sample = matrix[rng.choice(n, init_sample, replace=False)] if n > init_sample else matrix
+    squared = np.einsum("ij,ij->i", sample, sample)
+
+    centroids = np.empty((k, matrix.shape[1]), dtype=matrix.dtype)
+    centroids[0] = sample[rng.integers(len(sample))]
+    closest = squared - 2 * sample @ centroids[0] + centroids[0] @ centroids[0]
+    for i in range(1, k):
+        weights = np.clip(closest, 0, None)
+        total = weights.sum()
+        pick = rng.choice(len(sample), p=weights / total) if total > 0 else rng.integers(len(sample))
+        centroids[i] = sample[pick]
+        distance = squared - 2 * sample @ centroids[i] + centroids[i] @ centroids[i]
+        np.minimum(closest, distance, out=closest)
+
+    labels = np.zeros(n, dtype=np.int64)
+    for iteration in range(iterations):
+        # argmin ||x - c||^2 == argmax (x.c - |c|^2 / 2)
+        scores = matrix @ centroids.T - 0.5 * np.einsum("ij,ij->i", centroids, centroids)
+        new_labels = scores.argmax(axis=1)
+        if iteration and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        # Cluster sums as one matmul with the one-hot assignment (np.add.at is far slower)
+        assignment = np.zeros((k, n), dtype=matrix.dtype)
+        assignment[labels, np.arange(n)] = 1
+        sums = assignment @ matrix
+        sizes = assignment.sum(axis=1)
+        filled = sizes > 0
+        centroids[filled] = sums[filled] / sizes[filled, None]
+    return labels, centroids
+
+
+def _diverse(vectors, centroid, quota, trade_off=0.7):
+    """Maximal marginal relevance: close to the centroid, far from what is already picked."""
+    relevance = vectors @ centroid
+    chosen = [int(relevance.argmax())]
+    redundancy = vectors @ vectors[chosen[0]]
+    while len(chosen) < min(quota, len(vectors)):
+        score = trade_off * relevance - (1 - trade_off) * redundancy
+        score[chosen] = -np.inf
+        pick = int(score.argmax())
+        chosen.append(pick)
+        np.maximum(redundancy, vectors @ vectors[pick], out=redundancy)
+    return chosen
+
+
+class Selection:
+    """Representative items (in their original order) plus what they stand for."""
+
+    def __init__(self, items, clusters, subreddits, total):
+        self.items = items
+        self.clusters = clusters
+        self.subreddits = subreddits
+        self.total = total
+
+    def summary(self, max_subreddits=15, max_topics=12):
+        """Compact activity overview of the whole history for the prompt."""
+        lines = ["Subreddits (posts/comments):"]
+        ranked = sorted(self.subreddits.items(), key=lambda entry: -(entry[1]["P"] + entry[1]["C"]))
+        for subreddit, counts in ranked[:max_subreddits]:
+            share = (counts["P"] + counts["C"]) / self.total
+            lines.append(f"- {subreddit}: {counts['P']}/{counts['C']} ({share:.0%})")
+        lines.append("Recurring topics (share of items):")
+        for cluster in self.clusters[:max_topics]:
+            if cluster["terms"]:
+                lines.append(f"- {', '.join(cluster['terms'])} ({cluster['size'] / self.total:.0%})")
+        return "\n".join(lines)
+
+    def stats(self):
+        return {"items_selected": len(self.items), "clusters": len(self.clusters)}
+
+
+def subreddit_stats(items):
+    """Post and comment counts per subreddit; items whose subreddit is unknown are left out."""
+    stats = {}
+    for item in items:
+        if not item["subreddit"]:
+            continue
+        counts = stats.setdefault(item["subreddit"], {"P": 0, "C": 0})
+        counts[item["kind"]] += 1
+    return stats
+
+
+def select_representative(items, max_items=REPRESENTATIVE_ITEMS, n_features=N_FEATURES, seed=0):
+    """
+    Cluster normalised corpus items by topic and keep a diverse handful per
+    cluster, in proportion to cluster size (at least one per cluster).
+    """
+    n = len(items)
+    if n <= max_items:
+        return Selection(list(items), [], subreddit_stats(items), max(n, 1))
+
+    matrix, feature_terms = vectorize([item["text"] for item in items], n_features)
+    k = int(min(MAX_CLUSTERS, max_items, max(2, round((n / 2) ** 0.5))))
+    labels, centroids = kmeans(matrix, k, seed=seed)
+
+    sizes = np.bincount(labels, minlength=k)
+    order = [c for c in np.argsort(-sizes) if sizes[c]]
+    quotas = {c: max(1, int(round(max_items * sizes[c] / n))) for c in order}
+    while sum(quotas.values()) > max_items:
+        largest = max(quotas, key=quotas.get)
+        quotas[largest] -= 1
+        if quotas[largest] == 0:
+            del quotas[largest]
+
+    chosen, clusters = [], []
+    for c in order:
+        members = np.flatnonzero(labels == c)
+        if c in quotas:
+            picks = _diverse(matrix[members], centroids[c], quotas[c])
+            chosen.extend(int(members[i]) for i in picks)
+        top = np.argsort(-centroids[c])[:3]
+        clusters.append({
+            "size": int(sizes[c]),
+            "terms": [feature_terms[j] for j in top if centroids[c][j] > 0 and feature_terms[j]],
+        })
+
+    chosen.sort()
+    return Selection([items[i] for i in chosen], clusters, subreddit_stats(items), n)
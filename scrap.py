@@ -1,16 +1,116 @@
-import time
+import os
 import json
+import atexit
+import logging
+import threading
+from urllib.parse import urlparse
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from driver_pool import DriverPool
+from waits import AdaptiveWaiter
+from selector_cache import detect_layout, get_selector_cache
+from fetchers import DEFAULT_BASE_URL, FetchError, Fetcher, ResumePoint, get_http_fetcher, host_limiter
+from async_scrape import run, scrape_user
+from history import get_history_store
+from archive import archive_scrape
+from instrumentation import browser_rss, metrics
+from lean_browser import LEAN_BROWSER, apply_lean_options, block_urls, page_weight
+from bulk_extract import ITEM_ID_SCRIPT, PINNED_SCRIPT, SUBREDDIT_SCRIPT, COMMENT_DEFAULTS, POST_DEFAULTS, RELEASE_NODES, comment_fields, extract_batch, mark_seen, post_fields, to_record, unseen
+
+logger = logging.getLogger(__name__)
 
 class RedditUserScraper:
-    def __init__(self, headless=True):
+    POST_SELECTORS = [
+        '[data-testid="post-container"]',
+        'div[data-click-id="body"]',
+        'div[data-testid="post"]',
+        'article',
+        'div.Post',
+        'div[role="article"]',
+        'div.thing',
+        'shreddit-post'
+    ]
+    
+    # Try multiple selectors for comments
+    COMMENT_SELECTORS = [
+        '[data-testid="comment"]',
+        'div[data-testid="comment-tree-item"]',
+        'div.Comment',
+        'div[role="article"]',
+        'div.thing[data-type="comment"]',
+        'shreddit-comment',
+        'div[data-testid="comment-body-header"]',
+        'div.Comment__body',
+        'article[data-testid="comment"]',
+        'div.usertext',
+        'div[id*="thing_t1_"]'
+    ]
+    
+    TITLE_SELECTORS = [
+        '[data-testid="post-content"] h3',
+        'h3',
+        'h2',
+        'h1',
+        '[data-adclicklocation="title"]',
+        '.title a',
+        'a[data-click-id="body"]',
+        'shreddit-post h1',
+        '[slot="title"]'
+    ]
+    
+    CONTENT_SELECTORS = [
+        '[data-testid="post-content"] div[data-testid="post-text"]',
+        'div[data-testid="post-text"]',
+        '[data-click-id="text"]',
+        'div.usertext-body',
+        'div[data-testid="post-text-container"]',
+        'shreddit-post div[slot="text-body"]',
+        'div.RichTextJSON-root',
+        'div[data-testid="post-rtjson-content"]',
+        'div.s-prose',
+        'div[data-adclicklocation="media"]',
+        'div.Post__content',
+        'div[data-testid="post-content"] > div:last-child',
+        'p'
+    ]
+    
+    SUBREDDIT_SELECTORS = [
+        '[data-testid="subreddit-name"]',
+        '.subreddit',
+        'a[href*="/r/"]',
+        'span[data-testid="subreddit-name"]'
+    ]
+    
+    COMMENT_TEXT_SELECTORS = [
+        '[data-testid="comment-text"]',
+        'div[data-testid="comment-text"]',
+        'div.usertext-body',
+        'div.Comment__body',
+        'div[data-testid="comment-text-container"]',
+        'shreddit-comment div[slot="comment-body"]',
+        'div.RichTextJSON-root',
+        'div[data-testid="comment-rtjson-content"]',
+        'div.s-prose',
+        'div.md',
+        'p',
+        'div.Comment__body .RichTextJSON-root'
+    ]
+    
+    def __init__(self, headless=True, selector_cache=None, batch_extract=True, base_url=DEFAULT_BASE_URL,
+                 lean=LEAN_BROWSER, release_nodes=RELEASE_NODES):
         """Initialize the Reddit scraper with Chrome driver"""
         self.driver = None
+        self.base_url = base_url.rstrip("/")
+        self.batch_extract = batch_extract
+        self.lean = lean
+        # Opt-in: empty each post/comment node once extracted so page memory stays flat while scrolling
+        self.release_nodes = release_nodes
+        self.layout = "new"
+        self.selector_cache = selector_cache or get_selector_cache()
         self.setup_driver(headless)
     
     def setup_driver(self, headless=True):
@@ -21,105 +121,142 @@ class RedditUserScraper:
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--disable-dev-shm-usage")
         chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
         chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
+        if self.lean:
+            # Text only: no images, media, fonts or ad/analytics requests, smaller renderer
+            apply_lean_options(chrome_options)
+        else:
+            chrome_options.add_argument("--window-size=1920,1080")
         
-        self.driver = webdriver.Chrome(options=chrome_options)
+        with metrics.timer("driver_startup", headless=headless, lean=self.lean):
+            self.driver = webdriver.Chrome(options=chrome_options)
+            if self.lean:
+                block_urls(self.driver)
         self.wait = WebDriverWait(self.driver, 10)
+        self.waiter = AdaptiveWaiter(self.driver)
     
-    def scrape_user_posts(self, username, max_posts=30):
-        """Scrape posts from a Reddit user's profile"""
-        url = f"https://www.reddit.com/user/{username}/submitted/"
-        print(f"Scraping posts from: {url}")
+    def scrape_user_posts(self, username, max_posts=30, known_ids=None, on_progress=None, after=None):
+        """
+        Scrape posts from a Reddit user's profile, stopping at the first (unpinned) post in known_ids.
+        With after, posts down to and including that fullname are skipped.
+        """
+        url = f"{self.base_url}/user/{username}/submitted/"
+        logger.info("Scraping posts from: %s", url)
         
         try:
-            self.driver.get(url)
-            time.sleep(5)
+            with metrics.timer("page_load", kind="posts"):
+                self.driver.get(url)
+                self.waiter.page_ready(self.POST_SELECTORS, label="posts_page_load")
+            self._record_page_weight("posts")
+            self.layout = detect_layout(self.driver)
 
-            page_title = self.driver.title
-            print(f"Page title: {page_title}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Page title: %s", self.driver.title)
             
             try:
                 self.wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-                print("Page body loaded successfully")
+                logger.debug("Page body loaded successfully")
             except TimeoutException:
-                print("Page failed to load properly")
+                logger.warning("Page failed to load properly")
                 return []
             
-            post_selectors = [
-                '[data-testid="post-container"]',
-                'div[data-click-id="body"]',
-                'div[data-testid="post"]',
-                'article',
-                'div.Post',
-                'div[role="article"]',
-                'div.thing',
-                'shreddit-post'
-            ]
+            post_selectors = self.POST_SELECTORS
             
             posts_data = []
+            seen_ids = set()
+            selector = None
             scroll_count = 0
-            max_scrolls = 10
+            # Assume at least ~10 new posts per scroll; allow enough scrolls for large max_posts
+            max_scrolls = max(10, max_posts // 10)
+            point = ResumePoint(known_ids, after)
+            reached_known = False
             
             while len(posts_data) < max_posts and scroll_count < max_scrolls:
-                posts = []
-                
-                # Try different selectors
-                for selector in post_selectors:
-                    posts = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    if posts:
-                        print(f"Found {len(posts)} posts using selector: {selector}")
-                        break
+                if self.batch_extract:
+                    # One round trip extracts every post added since the last scroll
+                    with metrics.timer("extract", kind="posts", mode="batch") as span:
+                        selector, found, batch = self._extract_batch(
+                            "posts", post_selectors, max_posts - len(posts_data)
+                        )
+                        span["items"] = len(batch)
+                else:
+                    selector, posts = self._find_unseen("posts", post_selectors, selector)
+                    found = len(posts)
+                if found:
+                    logger.debug("Found %d posts using selector: %s", found, selector)
                 
-                if not posts:
-                    print("No posts found with any selector. Checking page source...")
+                if not found:
+                    logger.warning("No posts found with any selector. Checking page source...")
                     # Check if we're on the right page
-                    if "User not found" in self.driver.page_source or "doesn't exist" in self.driver.page_source:
-                        print("User doesn't exist or profile is private")
+                    page_source = self.driver.page_source
+                    if "User not found" in page_source or "doesn't exist" in page_source:
+                        logger.warning("User doesn't exist or profile is private")
                         return []
                     
-                    # Print some of the page source for debugging
-                    print("Page source preview:")
-                    print(self.driver.page_source[:500])
+                    # Log some of the page source for debugging
+                    logger.debug("Page source preview:\n%s", page_source[:500])
                     break
                 
-                for post in posts[len(posts_data):]:
-                    try:
-                        # Extract post data
-                        post_data = self.extract_post_data(post)
-                        if post_data:
-                            posts_data.append(post_data)
-                        
-                        if len(posts_data) >= max_posts:
+                if self.batch_extract:
+                    for post_data, pinned in batch:
+                        action = point.check(post_data.get('id'), pinned)
+                        if action == point.STOP:
+                            reached_known = True
                             break
+                        if action == point.SKIP or not self._first_sighting(post_data, seen_ids):
+                            continue
+                        logger.debug("Extracted post: %.50s...", post_data['title'])
+                        posts_data.append(post_data)
+                else:
+                    processed = []
+                    for post in posts:
+                        processed.append(post)
+                        try:
+                            # Extract post data
+                            with metrics.timer("extract", kind="posts", mode="element"):
+                                post_data = self.extract_post_data(post)
+                            action = point.check(post_data.get('id'), lambda: self._is_pinned(post)) if post_data else None
+                            if action == point.STOP:
+                                reached_known = True
+                                break
+                            if action == point.KEEP and self._first_sighting(post_data, seen_ids):
+                                posts_data.append(post_data)
                             
-                    except Exception as e:
-                        print(f"Error extracting post data: {e}")
-                        continue
+                            if len(posts_data) >= max_posts:
+                                break
+                                
+                        except Exception as e:
+                            logger.warning("Error extracting post data: %s", e)
+                            continue
+                    mark_seen(self.driver, processed, self.release_nodes)
                 
-                # Scroll to load more posts
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(3)
-                scroll_count += 1
+                if on_progress:
+                    on_progress("posts", len(posts_data))
                 
-                # Check if we've reached the end
-                new_posts = []
-                for selector in post_selectors:
-                    new_posts = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    if new_posts:
-                        break
+                if reached_known:
+                    logger.info("Reached an already scraped post, stopping")
+                    break
+                
+                # Scroll to load more posts, then wait for them; False once the page stops growing
+                growth_selectors = [selector] if selector else post_selectors
+                with metrics.timer("scroll", kind="posts"):
+                    self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                    grew = self.waiter.count_growth(unseen(growth_selectors), 0, label="posts_scroll")
+                if not point.waiting:
+                    # Scrolling past already stored posts does not use up the budget
+                    scroll_count += 1
                 
-                if len(new_posts) == len(posts):
-                    print("No new posts found after scrolling")
+                if not grew:
+                    logger.info("No new posts found after scrolling")
                     break
             
             return posts_data
             
         except TimeoutException:
-            print(f"Timeout loading user profile for {username}")
+            logger.warning("Timeout loading user profile for %s", username)
             return []
         except Exception as e:
-            print(f"Error scraping posts: {e}")
+            logger.error("Error scraping posts: %s", e)
             return []
     
     def extract_post_data(self, post_element):
@@ -127,60 +264,19 @@ class RedditUserScraper:
         try:
             post_data = {}
             
-            # Title - try multiple selectors
-            title_selectors = [
-                '[data-testid="post-content"] h3',
-                'h3',
-                'h2',
-                'h1',
-                '[data-adclicklocation="title"]',
-                '.title a',
-                'a[data-click-id="body"]',
-                'shreddit-post h1',
-                '[slot="title"]'
-            ]
-            
-            for selector in title_selectors:
-                try:
-                    title_element = post_element.find_element(By.CSS_SELECTOR, selector)
-                    post_data['title'] = title_element.text.strip()
-                    break
-                except NoSuchElementException:
-                    continue
-            
-            if 'title' not in post_data:
-                post_data['title'] = "No title found"
+            # Title - cached selector first, then the full list
+            _, title_element = self._resolve(
+                "post_title", self.TITLE_SELECTORS,
+                lambda selector: self._find_first(post_element, selector)
+            )
+            post_data['title'] = title_element.text.strip() if title_element else "No title found"
             
             # Post content/text - try multiple selectors for full post content
-            content_selectors = [
-                '[data-testid="post-content"] div[data-testid="post-text"]',
-                'div[data-testid="post-text"]',
-                '[data-click-id="text"]',
-                'div.usertext-body',
-                'div[data-testid="post-text-container"]',
-                'shreddit-post div[slot="text-body"]',
-                'div.RichTextJSON-root',
-                'div[data-testid="post-rtjson-content"]',
-                'div.s-prose',
-                'div[data-adclicklocation="media"]',
-                'div.Post__content',
-                'div[data-testid="post-content"] > div:last-child',
-                'p'
-            ]
-            
-            post_content = ""
-            for selector in content_selectors:
-                try:
-                    content_elements = post_element.find_elements(By.CSS_SELECTOR, selector)
-                    if content_elements:
-                        for elem in content_elements:
-                            text = elem.text.strip()
-                            if text and len(text) > 10:  # Only consider substantial text
-                                post_content += text + "\n"
-                        if post_content.strip():
-                            break
-                except NoSuchElementException:
-                    continue
+            _, post_content = self._resolve(
+                "post_content", self.CONTENT_SELECTORS,
+                lambda selector: self._collect_text(post_element, selector, min_length=10)
+            )
+            post_content = post_content or ""
             
             # If no content found, try to get any text content from the post
             if not post_content.strip():
@@ -197,91 +293,83 @@ class RedditUserScraper:
             
             post_data['content'] = post_content.strip() if post_content.strip() else "No content found"
             
-            subreddit_selectors = [
-                '[data-testid="subreddit-name"]',
-                '.subreddit',
-                'a[href*="/r/"]',
-                'span[data-testid="subreddit-name"]'
-            ]
-            
-            for selector in subreddit_selectors:
-                try:
-                    subreddit_element = post_element.find_element(By.CSS_SELECTOR, selector)
-                    post_data['subreddit'] = subreddit_element.text.strip()
-                    break
-                except NoSuchElementException:
-                    continue
+            _, subreddit_element = self._resolve(
+                "post_subreddit", self.SUBREDDIT_SELECTORS,
+                lambda selector: self._find_first(post_element, selector)
+            )
+            post_data['subreddit'] = subreddit_element.text.strip() if subreddit_element else "Unknown"
             
-            if 'subreddit' not in post_data:
-                post_data['subreddit'] = "Unknown"
+            item_id = self._item_id(post_element)
+            if item_id:
+                post_data['id'] = item_id
             
-            # Score/Upvotes - try multiple selectors 
-            print(f"Extracted post: {post_data.get('title', 'No title')[:50]}...")
-            print(f"Content length: {len(post_data.get('content', ''))}")
+            logger.debug("Extracted post: %.50s...", post_data.get('title', 'No title'))
+            logger.debug("Content length: %d", len(post_data.get('content', '')))
             
             return post_data
             
         except Exception as e:
-            print(f"Error extracting post data: {e}")
+            logger.warning("Error extracting post data: %s", e)
             return None
     
-    def scrape_user_comments(self, username, max_comments=50):
-        """Scrape comments from a Reddit user's profile"""
-        url = f"https://www.reddit.com/user/{username}/comments/"
-        print(f"Scraping comments from: {url}")
+    def scrape_user_comments(self, username, max_comments=50, known_ids=None, on_progress=None, after=None):
+        """
+        Scrape comments from a Reddit user's profile, stopping at the first (unpinned) comment in known_ids.
+        With after, comments down to and including that fullname are skipped.
+        """
+        url = f"{self.base_url}/user/{username}/comments/"
+        logger.info("Scraping comments from: %s", url)
         
         try:
-            self.driver.get(url)
-            time.sleep(5)
+            with metrics.timer("page_load", kind="comments"):
+                self.driver.get(url)
+                self.waiter.page_ready(self.COMMENT_SELECTORS, label="comments_page_load")
+            self._record_page_weight("comments")
+            self.layout = detect_layout(self.driver)
             
             # Debug: Check if page loaded correctly
-            page_title = self.driver.title
-            print(f"Page title: {page_title}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Page title: %s", self.driver.title)
             
             # Wait for page to load
             try:
                 self.wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-                print("Page body loaded successfully")
+                logger.debug("Page body loaded successfully")
             except TimeoutException:
-                print("Page failed to load properly")
+                logger.warning("Page failed to load properly")
                 return []
             
-            # Try multiple selectors for comments
-            comment_selectors = [
-                '[data-testid="comment"]',
-                'div[data-testid="comment-tree-item"]',
-                'div.Comment',
-                'div[role="article"]',
-                'div.thing[data-type="comment"]',
-                'shreddit-comment',
-                'div[data-testid="comment-body-header"]',
-                'div.Comment__body',
-                'article[data-testid="comment"]',
-                'div.usertext',
-                'div[id*="thing_t1_"]'
-            ]
+            comment_selectors = self.COMMENT_SELECTORS
             
             comments_data = []
+            seen_ids = set()
+            selector = None
             scroll_count = 0
-            max_scrolls = 15
+            max_scrolls = max(15, max_comments // 10)
+            point = ResumePoint(known_ids, after)
+            reached_known = False
             
             while len(comments_data) < max_comments and scroll_count < max_scrolls:
-                comments = []
-                
-                # Try different selectors
-                for selector in comment_selectors:
-                    comments = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    if comments:
-                        print(f"Found {len(comments)} comments using selector: {selector}")
-                        break
+                if self.batch_extract:
+                    # One round trip extracts every comment added since the last scroll
+                    with metrics.timer("extract", kind="comments", mode="batch") as span:
+                        selector, found, batch = self._extract_batch(
+                            "comments", comment_selectors, max_comments - len(comments_data)
+                        )
+                        span["items"] = len(batch)
+                else:
+                    selector, comments = self._find_unseen("comments", comment_selectors, selector)
+                    found = len(comments)
+                if found:
+                    logger.debug("Found %d comments using selector: %s", found, selector)
                 
-                if not comments:
-                    print("No comments found with any selector.")
+                if not found:
+                    logger.warning("No comments found with any selector.")
                     
                     # Try alternative approach - look for comment patterns in page source
                     page_source = self.driver.page_source
                     if "comment" in page_source.lower() or "usertext" in page_source.lower():
-                        print("Page contains comment-related content, trying alternative selectors...")
+                        logger.info("Page contains comment-related content, trying alternative selectors...")
                         
                         # Try broader selectors
                         alternative_selectors = [
@@ -292,64 +380,98 @@ class RedditUserScraper:
                             'p'
                         ]
                         
-                        for selector in alternative_selectors:
-                            comments = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                            if comments:
-                                print(f"Found {len(comments)} elements with alternative selector: {selector}")
-                                break
+                        if self.batch_extract:
+                            alternative, found, batch = self._extract_batch(
+                                "comments_alternative", alternative_selectors, max_comments - len(comments_data)
+                            )
+                            if found:
+                                logger.debug("Found %d elements with alternative selector: %s", found, alternative)
+                        else:
+                            for alternative in alternative_selectors:
+                                comments = self.driver.find_elements(By.CSS_SELECTOR, unseen([alternative])[0])
+                                if comments:
+                                    found = len(comments)
+                                    logger.debug("Found %d elements with alternative selector: %s", found, alternative)
+                                    break
                     
-                    if not comments:
+                    if not found:
                         # Check if we're on the right page
                         if "User not found" in page_source or "doesn't exist" in page_source:
-                            print("User doesn't exist or profile is private")
+                            logger.warning("User doesn't exist or profile is private")
                             return []
                         
-                        print("Still no comments found. Page source preview:")
-                        print(page_source[:1000])
+                        logger.warning("Still no comments found.")
+                        logger.debug("Page source preview:\n%s", page_source[:1000])
                         break
                 
                 # Process found comments
                 new_comments_found = 0
-                for comment in comments[len(comments_data):]:
-                    try:
-                        # Extract comment data
-                        comment_data = self.extract_comment_data(comment)
-                        if comment_data and comment_data.get('text', '').strip() not in ['No text found', '']:
+                if self.batch_extract:
+                    for comment_data, pinned in batch:
+                        action = point.check(comment_data.get('id'), pinned)
+                        if action == point.STOP:
+                            reached_known = True
+                            break
+                        if action == point.SKIP or not self._first_sighting(comment_data, seen_ids):
+                            continue
+                        if comment_data['text'] != 'No text found':
+                            logger.debug("Extracted comment: %.50s...", comment_data['text'])
                             comments_data.append(comment_data)
                             new_comments_found += 1
-                        
-                        if len(comments_data) >= max_comments:
-                            break
+                else:
+                    processed = []
+                    for comment in comments:
+                        processed.append(comment)
+                        try:
+                            # Extract comment data
+                            with metrics.timer("extract", kind="comments", mode="element"):
+                                comment_data = self.extract_comment_data(comment)
+                            action = (point.check(comment_data.get('id'), lambda: self._is_pinned(comment))
+                                      if comment_data else None)
+                            if action == point.STOP:
+                                reached_known = True
+                                break
+                            if (action == point.KEEP and self._first_sighting(comment_data, seen_ids)
+                                    and comment_data.get('text', '').strip() not in ['No text found', '']):
+                                comments_data.append(comment_data)
+                                new_comments_found += 1
                             
-                    except Exception as e:
-                        print(f"Error extracting comment data: {e}")
-                        continue
+                            if len(comments_data) >= max_comments:
+                                break
+                                
+                        except Exception as e:
+                            logger.warning("Error extracting comment data: %s", e)
+                            continue
+                    mark_seen(self.driver, processed, self.release_nodes)
                 
-                print(f"Added {new_comments_found} new comments, total: {len(comments_data)}")
+                logger.debug("Added %d new comments, total: %d", new_comments_found, len(comments_data))
                 
-                # Scroll to load more comments
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(3)
-                scroll_count += 1
+                if on_progress:
+                    on_progress("comments", len(comments_data))
                 
-                # Check if we've reached the end
-                new_comments = []
-                for selector in comment_selectors:
-                    new_comments = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    if new_comments:
-                        break
+                if reached_known:
+                    logger.info("Reached an already scraped comment, stopping")
+                    break
                 
-                if len(new_comments) <= len(comments):
-                    print("No new comments found after scrolling")
+                # Scroll to load more comments, then wait for them; False once the page stops growing
+                growth_selectors = [selector] if selector else comment_selectors
+                with metrics.timer("scroll", kind="comments"):
+                    self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                    grew = self.waiter.count_growth(unseen(growth_selectors), 0, label="comments_scroll")
+                if not point.waiting:
+                    scroll_count += 1
+                
+                if not grew:
+                    logger.info("No new comments found after scrolling")
                     break
             
             return comments_data
             
         except TimeoutException:
-            print(f"Timeout loading user comments for {username}")
+            logger.warning("Timeout loading user comments for %s", username)
             return []
         except Exception as e:
-            print(f"Error scraping comments: {e}")
+            logger.error("Error scraping comments: %s", e)
             return []
     
     def extract_comment_data(self, comment_element):
@@ -357,35 +479,12 @@ class RedditUserScraper:
         try:
             comment_data = {}
             
-            # Comment text - try multiple selectors
-            text_selectors = [
-                '[data-testid="comment-text"]',
-                'div[data-testid="comment-text"]',
-                'div.usertext-body',
-                'div.Comment__body',
-                'div[data-testid="comment-text-container"]',
-                'shreddit-comment div[slot="comment-body"]',
-                'div.RichTextJSON-root',
-                'div[data-testid="comment-rtjson-content"]',
-                'div.s-prose',
-                'div.md',
-                'p',
-                'div.Comment__body .RichTextJSON-root'
-            ]
-            
-            comment_text = ""
-            for selector in text_selectors:
-                try:
-                    text_elements = comment_element.find_elements(By.CSS_SELECTOR, selector)
-                    if text_elements:
-                        for elem in text_elements:
-                            text = elem.text.strip()
-                            if text and len(text) > 5:  # Only consider substantial text
-                                comment_text += text + "\n"
-                        if comment_text.strip():
-                            break
-                except NoSuchElementException:
-                    continue
+            # Comment text - cached selector first, then the full list
+            _, comment_text = self._resolve(
+                "comment_text", self.COMMENT_TEXT_SELECTORS,
+                lambda selector: self._collect_text(comment_element, selector, min_length=5)
+            )
+            comment_text = comment_text or ""
             
             if not comment_text.strip():
                 try:
@@ -400,53 +499,294 @@ class RedditUserScraper:
                     pass
             
             comment_data['text'] = comment_text.strip() if comment_text.strip() else "No text found"
+            comment_data['subreddit'] = self._subreddit(comment_element) or "Unknown"
+            
+            item_id = self._item_id(comment_element)
+            if item_id:
+                comment_data['id'] = item_id
             
-            print(f"Extracted comment: {comment_data.get('text', 'No text')[:50]}...")
+            logger.debug("Extracted comment: %.50s...", comment_data.get('text', 'No text'))
             
             return comment_data
             
         except Exception as e:
-            print(f"Error extracting comment data: {e}")
+            logger.warning("Error extracting comment data: %s", e)
+            return None
+    
+    def _extract_batch(self, kind, container_selectors, limit):
+        """Extract unseen posts or comments with a single in-browser script call; records come as (record, pinned) pairs"""
+        if kind == "posts":
+            fields = post_fields(self.TITLE_SELECTORS, self.CONTENT_SELECTORS, self.SUBREDDIT_SELECTORS)
+            defaults = POST_DEFAULTS
+        else:
+            fields = comment_fields(self.COMMENT_TEXT_SELECTORS)
+            defaults = COMMENT_DEFAULTS
+        
+        # Cached winners go first so the in-page probing stops early too
+        for field in fields:
+            field["selectors"] = self.selector_cache.ordered(self.layout, field["role"], field["selectors"])
+        containers = self.selector_cache.ordered(self.layout, kind, container_selectors)
+        
+        selector, total, items = extract_batch(self.driver, containers, fields, limit, self.release_nodes)
+        if selector:
+            self.selector_cache.record(self.layout, kind, selector)
+        
+        records = []
+        for item in items:
+            for field in fields:
+                winner = item["winners"].get(field["name"])
+                if winner:
+                    self.selector_cache.record(self.layout, field["role"], winner)
+            records.append((to_record(item["values"], defaults, item.get("id")), bool(item.get("pinned"))))
+        return selector, total, records
+    
+    def _find_unseen(self, kind, container_selectors, selector=None):
+        """
+        Elements not extracted on an earlier pass. The first pass resolves the
+        container selector (cached selector for this layout first); later passes reuse it.
+        """
+        if selector:
+            return selector, self.driver.find_elements(By.CSS_SELECTOR, unseen([selector])[0])
+        selector, elements = self._resolve(
+            kind, container_selectors,
+            lambda selector: self.driver.find_elements(By.CSS_SELECTOR, unseen([selector])[0])
+        )
+        return selector, elements or []
+    
+    @staticmethod
+    def _first_sighting(item, seen_ids):
+        """False for an item already collected in this scrape (re-rendered nodes); items without an id always pass"""
+        item_id = item.get('id')
+        if not item_id:
+            return True
+        if item_id in seen_ids:
+            return False
+        seen_ids.add(item_id)
+        return True
+    
+    def _is_pinned(self, element):
+        """Whether a post or comment element is pinned/stickied to the top of the profile"""
+        try:
+            return bool(self.driver.execute_script(PINNED_SCRIPT, element))
+        except Exception:
+            return False
+    
+    def _item_id(self, element):
+        """Reddit fullname (t3_/t1_) of a post or comment element, if the layout exposes one"""
+        try:
+            return self.driver.execute_script(ITEM_ID_SCRIPT, element)
+        except Exception:
+            return None
+    
+    def _subreddit(self, element):
+        """Prefixed subreddit a comment element was made in, if the layout shows one"""
+        try:
+            return self.driver.execute_script(SUBREDDIT_SCRIPT, element)
+        except Exception:
+            return None
+    
+    def _record_page_weight(self, kind):
+        """Bytes and requests the profile page pulled in; costs a round trip, so only with metrics on"""
+        if not metrics.enabled:
+            return
+        weight = page_weight(self.driver)
+        if weight:
+            metrics.gauge("page_transfer_bytes", weight["transfer_bytes"], kind=kind, lean=self.lean)
+            metrics.gauge("page_requests", weight["requests"], kind=kind, lean=self.lean)
+    
+    def _resolve(self, role, candidates, probe):
+        """Selector-cache lookup for the current layout, timed as a selector probe"""
+        with metrics.timer("selector_probe", role=role, layout=self.layout):
+            return self.selector_cache.resolve(self.layout, role, candidates, probe)
+    
+    def _find_first(self, element, selector):
+        """Return the first descendant matching selector, or None"""
+        try:
+            return element.find_element(By.CSS_SELECTOR, selector)
+        except NoSuchElementException:
             return None
     
+    def _collect_text(self, element, selector, min_length):
+        """Join the substantial text of every descendant matching selector"""
+        collected = ""
+        try:
+            for elem in element.find_elements(By.CSS_SELECTOR, selector):
+                text = elem.text.strip()
+                if text and len(text) > min_length:  # Only consider substantial text
+                    collected += text + "\n"
+        except NoSuchElementException:
+            pass
+        return collected if collected.strip() else ""
+    
     def get_json(self, data):
-        return json.dumps(data, indent=2, ensure_ascii=False) 
+        return get_json(data)
+    
+    def is_alive(self):
+        """Cheap health check used by the driver pool before reusing a session"""
+        if not self.driver:
+            return False
+        try:
+            self.driver.current_url
+            return True
+        except Exception:
+            return False
     
     def close(self):
         """Close the browser driver"""
         if self.driver:
             self.driver.quit()
+            self.driver = None
+
+_pool = None
+_pool_lock = threading.Lock()
 
-def main(username):
+def get_pool(size=2, max_uses=25):
+    """Return the process-wide pool of warm headless scrapers, creating it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool(lambda: RedditUserScraper(headless=True), size=size, max_uses=max_uses)
+            atexit.register(close_pool)
+        return _pool
+
+def close_pool():
+    """Quit the process-wide pool's browsers, if it was ever started"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+class SeleniumFetcher(Fetcher):
+    """Fetcher backend that renders the profile in a pooled headless Chrome"""
+    
+    name = "selenium"
+    
+    def __init__(self, pool=None, rate_limiter=host_limiter):
+        self.pool = pool or get_pool()
+        self.rate_limiter = rate_limiter
+    
+    def fetch_posts(self, username, max_posts=30, known_ids=None, on_progress=None, after=None):
+        return self._run(lambda scraper: scraper.scrape_user_posts(username, max_posts, known_ids, on_progress, after))
+    
+    def fetch_comments(self, username, max_comments=50, known_ids=None, on_progress=None, after=None):
+        return self._run(
+            lambda scraper: scraper.scrape_user_comments(username, max_comments, known_ids, on_progress, after)
+        )
+    
+    def _run(self, scrape):
+        scraper = self.pool.acquire()
+        broken = False
+        try:
+            if self.rate_limiter:
+                self.rate_limiter.acquire(urlparse(scraper.base_url).netloc)
+            scraper.waiter.reset()
+            result = scrape(scraper)
+            logger.debug("Wait timings: %s", scraper.waiter.summary())
+            if metrics.enabled:
+                metrics.gauge("browser_rss_bytes", browser_rss(scraper.driver))
+            return result
+        except Exception:
+            broken = not scraper.is_alive()
+            raise
+        finally:
+            self.pool.release(scraper, broken=broken)
+            scraper.selector_cache.save()
+            logger.debug("Selector cache stats: %s", scraper.selector_cache.stats())
+            logger.debug("Driver pool stats: %s", self.pool.stats())
+
+DEFAULT_BACKEND = os.environ.get("REDDIT_FETCH_BACKEND", "auto")
+
+def get_fetcher(backend):
+    """Return the shared fetcher for 'http' or 'selenium'"""
+    if backend == "http":
+        return get_http_fetcher()
+    if backend == "selenium":
+        return SeleniumFetcher()
+    raise ValueError(f"Unknown fetch backend: {backend}")
+
+def fetch_listing(kind, username, limit, backend=DEFAULT_BACKEND, known_ids=None, on_progress=None, after=None):
+    """
+    Fetch 'posts' or 'comments' with the requested backend.
+    In 'auto' mode the HTTP backend is tried first and Selenium is only used
+    when the JSON listing is unavailable (blocked, rate limited, unreachable).
+    on_progress(kind, count) is called as items are found.
+    """
+    method = "fetch_posts" if kind == "posts" else "fetch_comments"
+    if backend != "auto":
+        return getattr(get_fetcher(backend), method)(username, limit, known_ids, on_progress, after)
+    
+    try:
+        return getattr(get_fetcher("http"), method)(username, limit, known_ids, on_progress, after)
+    except FetchError as e:
+        if e.status == 404:
+            logger.info("User %s not found", username)
+            return []
+        logger.warning("HTTP backend failed for %s (%s), falling back to Selenium", kind, e)
+    return getattr(get_fetcher("selenium"), method)(username, limit, known_ids, on_progress, after)
+
+def fetch_listing_incremental(kind, username, limit, backend=DEFAULT_BACKEND, history=None, on_progress=None):
+    """
+    Fetch only the items newer than the last stored one, merge them into the
+    user's history and return the newest `limit` items of the merged history.
+    If the history still holds fewer than `limit` items (an earlier scrape
+    asked for fewer), page on below the oldest stored item to backfill it.
+    """
+    history = history or get_history_store()
+    known_ids = history.known_ids(username, kind)
+    new_items = fetch_listing(kind, username, limit, backend, known_ids, on_progress)
+    added = history.merge(username, kind, new_items)
+    logger.info("%d new %s for %s (%d already known)", added, kind, username, len(known_ids))
+
+    stored = len(known_ids) + added
+    oldest = history.oldest_id(username, kind) if known_ids and stored < limit else None
+    if oldest:
+        older_items = fetch_listing(kind, username, limit - stored, backend, known_ids, on_progress, after=oldest)
+        backfilled = history.merge(username, kind, older_items, older=True)
+        logger.info("Backfilled %d older %s for %s", backfilled, kind, username)
+    return history.items(username, kind, limit)
+
+def _listing_fetch(backend, incremental, on_progress=None):
+    if incremental:
+        return lambda kind, name, limit: fetch_listing_incremental(kind, name, limit, backend, on_progress=on_progress)
+    return lambda kind, name, limit: fetch_listing(kind, name, limit, backend, on_progress=on_progress)
+
+def fetch_user(username, max_posts=20, max_comments=30, backend=DEFAULT_BACKEND, incremental=False, on_progress=None):
+    """Fetch posts and comments concurrently and archive them; returns (posts, comments) as lists"""
+    fetch = _listing_fetch(backend, incremental, on_progress)
+    posts, comments = run(scrape_user(username, fetch, max_posts, max_comments))
+    archive_scrape(username, posts, comments)
+    return posts, comments
+
+def get_json(data):
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+def main(username, backend=DEFAULT_BACKEND, incremental=True, max_posts=20, max_comments=30, on_progress=None):
     
     if not username:
-        print("Username cannot be empty!")
+        logger.error("Username cannot be empty!")
         return
     
-    scraper = RedditUserScraper(headless=True)  # Set to True for headless mode
+    posts, comments = [], []
     
     try:
-        print(f"Scraping data for user: {username}")
-        
-        # Scrape posts
-        posts = scraper.scrape_user_posts(username, max_posts=20)
-        print(f"Found {len(posts)} posts")
+        logger.info("Scraping data for user: %s (backend: %s)", username, backend)
         
-        # Scrape comments
-        comments = scraper.scrape_user_comments(username, max_comments=30)
-        print(f"Found {len(comments)} comments")
+        # Scrape posts and comments at the same time
+        posts, comments = fetch_user(
+            username, max_posts, max_comments, backend=backend, incremental=incremental, on_progress=on_progress
+        )
+        logger.info("Found %d posts and %d comments", len(posts), len(comments))
        
         if posts:
-            posts = scraper.get_json(posts)
+            posts = get_json(posts)
         
         if comments:
-            comments = scraper.get_json(comments)
+            comments = get_json(comments)
         
-        print("Scraping completed!")
+        logger.info("Scraping completed!")
     
     except Exception as e:
-        print(f"An error occurred: {e}") 
-    finally:
-        scraper.close() 
+        logger.error("An error occurred: %s", e)
     
     return posts, comments 
@@ -0,0 +1,153 @@
+import os
+import json
+import logging
+import threading
+
+# One round trip to tell the three Reddit front-ends apart.
+DETECT_LAYOUT_SCRIPT = """
+if (document.querySelector('shreddit-app, shreddit-post, shreddit-comment')) return 'shreddit';
+if (location.hostname.indexOf('old.') === 0 || document.querySelector('#siteTable, div.thing')) return 'old';
+return 'new';
+"""
+
+DEFAULT_CACHE_PATH = os.environ.get("REDDIT_SELECTOR_CACHE", "selector_cache.json")
+
+logger = logging.getLogger(__name__)
+
+
+def detect_layout(driver):
+    """Return 'old', 'new' or 'shreddit' for the page currently loaded in ``driver``."""
+    try:
+        return driver.execute_script(DETECT_LAYOUT_SCRIPT) or "new"
+    except Exception:
+        return "new"
+
+
+class SelectorCache:
+    """
+    Remembers which CSS selector last matched for each (layout, role) pair.
+
+    ``resolve`` tries the remembered selector first and only falls back to
+    probing the full candidate list when it misses. Winners and hit/miss
+    counters are persisted to a JSON file so they survive restarts.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._selectors = {}
+        self._stats = {}
+        self._dirty = False
+        self.load()
+
+    def resolve(self, layout, role, candidates, probe):
+        """
+        Return ``(selector, result)`` for the first selector whose ``probe`` is truthy.
+
+        ``probe`` is called with a selector and does the actual lookup. When
+        nothing matches, ``(None, result_of_last_probe)`` is returned.
+        """
+        key = f"{layout}:{role}"
+        with self._lock:
+            cached = self._selectors.get(key)
+
+        result = None
+        if cached in candidates:
+            result = probe(cached)
+            if result:
+                self._count(key, "hits")
+                return cached, result
+
+        self._count(key, "misses")
+        for selector in candidates:
+            if selector == cached:
+                continue
+            result = probe(selector)
+            if result:
+                with self._lock:
+                    self._selectors[key] = selector
+                    self._dirty = True
+                return selector, result
+
+        return None, result
+
+    def ordered(self, layout, role, candidates):
+        """Return ``candidates`` with the cached selector moved to the front."""
+        with self._lock:
+            cached = self._selectors.get(f"{layout}:{role}")
+        if cached not in candidates:
+            return list(candidates)
+        return [cached] + [selector for selector in candidates if selector != cached]
+
+    def record(self, layout, role, selector):
+        """Record a match found outside ``resolve`` (e.g. by in-page extraction)."""
+        key = f"{layout}:{role}"
+        with self._lock:
+            hit = self._selectors.get(key) == selector
+            if not hit:
+                self._selectors[key] = selector
+                self._dirty = True
+        self._count(key, "hits" if hit else "misses")
+
+    def stats(self):
+        """Per-key hit/miss counters plus overall totals and hit rate."""
+        with self._lock:
+            per_key = {key: dict(counts) for key, counts in self._stats.items()}
+        hits = sum(counts.get("hits", 0) for counts in per_key.values())
+        misses = sum(counts.get("misses", 0) for counts in per_key.values())
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "keys": per_key,
+        }
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable selector cache %s: %s", self.path, e)
+            return
+        with self._lock:
+            self._selectors = data.get("selectors", {})
+            self._stats = data.get("stats", {})
+
+    def save(self):
+        """Write the cache to disk if anything changed since the last save."""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"selectors": dict(self._selectors), "stats": {k: dict(v) for k, v in self._stats.items()}}
+            self._dirty = False
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Could not save selector cache %s: %s", self.path, e)
+
+    def _count(self, key, field):
+        with self._lock:
+            counts = self._stats.setdefault(key, {"hits": 0, "misses": 0})
+            counts[field] += 1
+            self._dirty = True
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_selector_cache():
+    """Return the process-wide selector cache shared by all scrapers."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = SelectorCache()
+        return _default_cache
@@ -0,0 +1,197 @@
+import os
+import queue
+import logging
+import itertools
+import threading
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class Flight:
+    """One in-flight computation; followers block in ``wait`` until the leader finishes."""
+
+    def __init__(self):
+        self.followers = 0
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def listen(self, listener):
+        if listener is not None:
+            with self._lock:
+                self._listeners.append(listener)
+
+    def notify(self, *args):
+        """Forward a progress event from the leader to every caller's listener."""
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(*args)
+            except Exception:
+                logger.exception("Progress listener failed")
+
+    def finish(self, result=None, error=None):
+        self._result, self._error = result, error
+        self._done.set()
+
+    def wait(self, timeout=None):
+        if not self._done.wait(timeout):
+            raise TimeoutError("Timed out waiting for the in-flight call")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key.
+
+    The first caller for a key (the leader) runs the work; callers arriving
+    while it is in flight wait for it and share its result or exception.
+    Once it finishes the key is released, so later callers start afresh
+    (normally hitting whatever cache the leader filled).
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "followers": 0}
+
+    def begin(self, key, listener=None):
+        """Join or start the flight for ``key``; returns ``(flight, is_leader)``."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Flight()
+                self._stats["leaders"] += 1
+            else:
+                flight.followers += 1
+                self._stats["followers"] += 1
+        flight.listen(listener)
+        return flight, leader
+
+    def end(self, key, flight, result=None, error=None):
+        """Release ``key`` and hand the outcome to every follower."""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.finish(result, error)
+
+    def do(self, key, fn, listener=None):
+        """
+        Run ``fn(notify)`` once per concurrent ``key`` and return its result to
+        every caller. ``notify(*args)`` forwards progress to each caller's ``listener``.
+        """
+        flight, leader = self.begin(key, listener)
+        if not leader:
+            return flight.wait()
+        try:
+            result = fn(flight.notify)
+        except BaseException as e:
+            self.end(key, flight, error=e)
+            raise
+        self.end(key, flight, result=result)
+        return result
+
+    def in_flight(self, key):
+        with self._lock:
+            return key in self._flights
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._flights))
+
+
+class JobQueue:
+    """
+    Small worker pool that runs jobs by priority (lower first, FIFO within a priority).
+
+    Submitting a ``key`` that is already queued or running returns the same
+    future instead of queueing the work again; a more urgent resubmission (or
+    ``promote``) moves a still-queued job forward.
+    """
+
+    def __init__(self, workers=2, name="jobs"):
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._jobs = {}
+        self._running = 0
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"{name}-{i}", daemon=True) for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, fn, *args, priority=0, key=None, **kwargs):
+        with self._lock:
+            if key is not None and key in self._jobs:
+                self._promote(key, priority)
+                return self._jobs[key][0]
+            future = Future()
+            job = (future, fn, args, kwargs)
+            if key is not None:
+                self._jobs[key] = (future, priority, job)
+            self._queue.put((priority, next(self._order), key, job))
+        return future
+
+    def promote(self, key, priority):
+        """Run the queued job for ``key`` at ``priority`` if that is more urgent; True if it moved."""
+        with self._lock:
+            return self._promote(key, priority)
+
+    def _promote(self, key, priority):
+        entry = self._jobs.get(key)
+        if entry is None:
+            return False
+        future, queued_priority, job = entry
+        if priority >= queued_priority or future.running() or future.done():
+            return False
+        # The old heap entry stays behind and is skipped when a worker pops it.
+        self._jobs[key] = (future, priority, job)
+        self._queue.put((priority, next(self._order), key, job))
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {"queued": self._queue.qsize(), "running": self._running, "keys": len(self._jobs)}
+
+    def _work(self):
+        while True:
+            _, _, key, (future, fn, args, kwargs) = self._queue.get()
+            with self._lock:
+                # A promoted job's stale entry, or a job cancelled while queued.
+                if future.running() or future.done() or not future.set_running_or_notify_cancel():
+                    self._forget(key, future)
+                    continue
+                self._running += 1
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._forget(key, future)
+
+    def _forget(self, key, future):
+        if key is not None and future.done() and key in self._jobs and self._jobs[key][0] is future:
+            del self._jobs[key]
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Return the process-wide job queue (REDDIT_JOB_WORKERS workers, default 2)."""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue(int(os.environ.get("REDDIT_JOB_WORKERS", "2")))
+        return _job_queue
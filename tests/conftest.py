@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+from benchmarks.fake_model import FakeModel
+from benchmarks.fixture_server import FixtureServer
+from fetchers import HttpFetcher
+from persona_cache import PersonaCache
+from ratelimit import RateLimiter
+
+
+@pytest.fixture(autouse=True)
+def unthrottled_gemini(monkeypatch):
+    """The fake model has no quota; do not pace it at Gemini's rate."""
+    monkeypatch.setattr("model.gemini_limiter", RateLimiter(1e6, burst=1000))
+
+
+@pytest.fixture
+def server():
+    """Fixture site with the recorded old Reddit layout, serving JSON listings too."""
+    with FixtureServer("old") as server:
+        yield server
+
+
+@pytest.fixture
+def http_fetcher(server):
+    fetcher = HttpFetcher(base_url=server.url, rate_limiter=None, page_size=25)
+    yield fetcher
+    fetcher.close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = PersonaCache(os.path.join(tmp_path, "persona_cache.sqlite3"))
+    yield cache
+    cache.disk.close()
+
+
+@pytest.fixture
+def fake_model():
+    return FakeModel(latency=0)
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from archive import Archive
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = Archive(str(tmp_path))
+    yield archive
+    archive.close()
+
+
+def test_latest_pairs_both_listings_of_the_newest_scrape(archive):
+    archive.append_user("Alice", [{"id": "t3_a"}], [{"id": "t1_a"}], scraped_at=100)
+    archive.append_user("alice", [{"id": "t3_b"}], json.dumps([{"id": "t1_b"}]), scraped_at=200)
+
+    assert archive.latest("ALICE") == ([{"id": "t3_b"}], [{"id": "t1_b"}], 200)
+
+
+def test_an_empty_listing_is_not_replaced_by_an_older_one(archive):
+    archive.append_user("alice", [{"id": "t3_a"}], [{"id": "t1_a"}], scraped_at=100)
+    archive.append_user("alice", [{"id": "t3_b"}], [], scraped_at=200)
+
+    assert archive.latest("alice") == ([{"id": "t3_b"}], [], 200)
+
+
+def test_append_of_one_kind_keeps_the_other_kinds_newest_snapshot(archive):
+    archive.append_user("alice", [{"id": "t3_a"}], [{"id": "t1_a"}], scraped_at=100)
+    archive.append("alice", "comments", [{"id": "t1_b"}], scraped_at=200)
+
+    assert archive.latest("alice") == ([{"id": "t3_a"}], [{"id": "t1_b"}], 200)
+
+
+def test_an_unchanged_listing_reuses_its_frame(archive):
+    first = archive.append_user("alice", [{"id": "t3_a"}], [{"id": "t1_a"}], scraped_at=100)
+    size = archive.stats()["bytes"]
+    second = archive.append_user("alice", [{"id": "t3_a"}], [{"id": "t1_a"}], scraped_at=200)
+
+    assert archive.stats()["bytes"] == size
+    assert [row[4:6] for row in archive.snapshots(latest_only=True)] == \
+        [row[4:6] for row in archive.snapshots() if row[0] in first]
+    assert first != second
+
+
+def test_unknown_user_has_no_latest(archive):
+    assert archive.latest("nobody") is None
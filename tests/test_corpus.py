@@ -0,0 +1,77 @@
+from corpus import build_corpus, deduplicate, prepare_items, shard_corpus
+
+
+def comment(text, subreddit="r/test"):
+    return {"kind": "C", "subreddit": subreddit, "text": text}
+
+
+def test_exact_duplicates_are_dropped_after_normalisation():
+    items = [comment("Same text, here."), comment("same   TEXT here"), comment("Other text")]
+
+    assert [item["text"] for item in deduplicate(items)] == ["Same text, here.", "Other text"]
+
+
+def test_near_duplicates_are_dropped():
+    text = "I finally finished the long trail run along the river after weeks of training and stretching"
+    items = [comment(text), comment(text + " today"), comment("A completely different thought about cooking rice")]
+
+    assert len(deduplicate(items)) == 2
+
+
+def test_non_latin_and_emoji_only_items_are_kept():
+    posts = [
+        {"title": "Как выбрать велосипед для города", "content": "Посоветуйте модель до 50 тысяч", "subreddit": "r/russia"},
+        {"title": "Лучшие книги этого года", "content": "Что читали в последнее время?", "subreddit": "r/books"},
+    ]
+    comments = [
+        {"text": "東京で一番おいしいラーメン屋はどこですか"},
+        {"text": "Согласен, зимой на велосипеде тяжело"},
+        {"text": "🔥🔥🔥"},
+    ]
+
+    corpus = build_corpus(posts, comments)
+
+    assert corpus.stats["items_after_dedup"] == 5
+    assert "東京" in corpus.text and "🔥🔥🔥" in corpus.text
+
+
+def test_emoji_only_items_still_deduplicate_among_themselves():
+    items = prepare_items([], [{"text": "🔥🔥🔥"}, {"text": "🔥🔥🔥"}, {"text": "👍"}])
+
+    assert [item["text"] for item in items] == ["🔥🔥🔥", "👍"]
+
+
+def test_placeholders_are_stripped():
+    posts = [{"title": "Real title", "content": "No content found", "subreddit": "Unknown"}]
+
+    assert prepare_items(posts, [{"text": "No text found"}]) == [{"kind": "P", "subreddit": "", "text": "Real title"}]
+
+
+def test_corpus_fits_the_budget_and_keeps_listing_order():
+    comments = [{"text": f"Comment number {i} about topic {i * 7} with some extra words"} for i in range(200)]
+
+    corpus = build_corpus([], comments, token_budget=300, representative_min_items=0)
+
+    assert corpus.tokens_after <= 300
+    numbers = [int(line.split()[3]) for line in corpus.text.splitlines()]
+    assert numbers == sorted(numbers)
+    assert corpus.stats["items_kept"] < corpus.stats["items_selected"] == 200
+
+
+def test_shards_cover_every_item_within_the_budget():
+    items = [comment(f"Item {i} says something distinct about number {i}") for i in range(100)]
+
+    shards = shard_corpus(items, shard_budget=200)
+
+    assert len(shards) > 1
+    assert sum(len(shard.splitlines()) for shard in shards) == 100
+
+
+def test_summary_leaves_out_items_without_a_subreddit():
+    posts = [{"title": f"Post {i} about gardening tomatoes", "subreddit": "r/gardening"} for i in range(30)]
+    comments = [{"text": f"Comment {i} on a thread I cannot place"} for i in range(60)]
+
+    corpus = build_corpus(posts, comments, representative_min_items=50)
+
+    assert "- r/gardening: 30/0 (33%)" in corpus.summary
+    assert "unknown" not in corpus.summary.lower()
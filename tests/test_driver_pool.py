@@ -0,0 +1,101 @@
+import itertools
+
+import pytest
+
+from driver_pool import DriverPool
+
+
+class FakeSession:
+    ids = itertools.count()
+
+    def __init__(self):
+        self.id = next(self.ids)
+        self.alive = True
+        self.closed = False
+
+    def is_alive(self):
+        return self.alive
+
+    def close(self):
+        self.closed = True
+
+
+def test_sessions_are_reused():
+    pool = DriverPool(FakeSession, size=2)
+
+    first = pool.acquire()
+    pool.release(first)
+
+    assert pool.acquire() is first
+    assert pool.stats()["created"] == 1
+
+
+def test_sessions_are_recycled_after_max_uses():
+    pool = DriverPool(FakeSession, size=1, max_uses=2)
+
+    first = pool.acquire()
+    pool.release(first)
+    assert pool.acquire() is first
+    pool.release(first)
+    replacement = pool.acquire()
+
+    assert replacement is not first
+    assert first.closed
+    assert pool.stats()["recycled"] == 1
+
+
+def test_broken_sessions_are_recycled():
+    pool = DriverPool(FakeSession, size=1)
+
+    with pytest.raises(RuntimeError):
+        with pool.borrow() as session:
+            session.alive = False
+            raise RuntimeError("chrome crashed")
+
+    assert session.closed
+    assert pool.acquire() is not session
+    assert pool.stats()["recycled"] == 1
+
+
+def test_a_failing_borrower_with_a_healthy_session_keeps_it():
+    pool = DriverPool(FakeSession, size=1)
+
+    with pytest.raises(ValueError):
+        with pool.borrow() as session:
+            raise ValueError("selector not found")
+
+    assert pool.acquire() is session
+
+
+def test_dead_idle_sessions_fail_the_health_check():
+    pool = DriverPool(FakeSession, size=1)
+    session = pool.acquire()
+    pool.release(session)
+    session.alive = False
+
+    replacement = pool.acquire()
+
+    assert replacement is not session
+    assert session.closed
+    assert pool.stats()["failed_health_checks"] == 1
+
+
+def test_acquire_times_out_when_every_session_is_busy():
+    pool = DriverPool(FakeSession, size=1)
+    pool.acquire()
+
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.1)
+    assert pool.stats()["in_use"] == 1
+
+
+def test_close_shuts_idle_sessions_and_refuses_borrows():
+    pool = DriverPool(FakeSession, size=2)
+    session = pool.acquire()
+    pool.release(session)
+
+    pool.close()
+
+    assert session.closed
+    with pytest.raises(RuntimeError):
+        pool.acquire()
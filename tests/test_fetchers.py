@@ -0,0 +1,86 @@
+from fetchers import HttpFetcher, ResumePoint
+
+
+def test_follows_the_after_cursor_across_pages(server, http_fetcher):
+    http_fetcher.page_size = 7
+    posts = http_fetcher.fetch_posts("alice", max_posts=20)
+
+    expected = server.site.history("alice", "submitted")[:20]
+    assert [post["id"] for post in posts] == [item["name"] for item in expected]
+    assert posts[0] == HttpFetcher.to_post(expected[0])
+    # 7 + 7 + 6 items
+    assert server.requests["listing"] == 3
+
+
+def test_stops_when_the_listing_runs_out(server, http_fetcher):
+    comments = http_fetcher.fetch_comments("alice", max_comments=500)
+
+    assert len(comments) == len(server.site.history("alice", "comments")) == 90
+    # Pages of 25, 25, 25 and 15; the last page has no after cursor.
+    assert server.requests["listing"] == 4
+
+
+def test_comments_carry_their_subreddit(server, http_fetcher):
+    comments = http_fetcher.fetch_comments("alice", max_comments=10)
+
+    expected = server.site.history("alice", "comments")[:10]
+    assert [comment["subreddit"] for comment in comments] == [item["subreddit_name_prefixed"] for item in expected]
+
+
+def test_stops_at_the_first_known_item(server, http_fetcher):
+    history = server.site.history("alice", "submitted")
+    known = {item["name"] for item in history[3:]}
+
+    posts = http_fetcher.fetch_posts("alice", max_posts=30, known_ids=known)
+
+    assert [post["id"] for post in posts] == [item["name"] for item in history[:3]]
+    assert server.requests["listing"] == 1
+
+
+def test_known_pinned_items_do_not_end_the_listing(server, http_fetcher):
+    history = server.site.history("alice", "submitted")
+    pinned = dict(history.pop(10), stickied=True)
+    history.insert(0, pinned)
+    known = {item["name"] for item in history[4:]} | {pinned["name"]}
+
+    posts = http_fetcher.fetch_posts("alice", max_posts=30, known_ids=known)
+
+    assert [post["id"] for post in posts] == [item["name"] for item in history[1:4]]
+
+
+def test_after_resumes_below_that_item(server, http_fetcher):
+    history = server.site.history("alice", "submitted")
+
+    posts = http_fetcher.fetch_posts("alice", max_posts=10, after=history[19]["name"])
+
+    assert [post["id"] for post in posts] == [item["name"] for item in history[20:30]]
+
+
+def test_progress_is_reported_per_item(http_fetcher):
+    events = []
+    http_fetcher.fetch_comments("alice", max_comments=5, on_progress=lambda kind, count: events.append((kind, count)))
+
+    assert events == [("comments", count) for count in range(1, 6)]
+
+
+def test_resume_point_skips_until_after_then_stops_at_known():
+    point = ResumePoint(known_ids={"t3_c"}, after="t3_a")
+
+    actions = [point.check(item_id) for item_id in ("t3_x", "t3_a", "t3_b", "t3_c")]
+
+    assert actions == [point.SKIP, point.SKIP, point.KEEP, point.STOP]
+
+
+def test_resume_point_only_evaluates_pinned_for_known_items():
+    calls = []
+
+    def pinned():
+        calls.append(1)
+        return True
+
+    point = ResumePoint(known_ids={"t3_a"})
+
+    assert point.check("t3_new", pinned) == point.KEEP
+    assert calls == []
+    assert point.check("t3_a", pinned) == point.SKIP
+    assert calls == [1]
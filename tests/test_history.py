@@ -0,0 +1,55 @@
+import os
+
+import pytest
+
+from history import HistoryStore, item_key
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(os.path.join(tmp_path, "history.sqlite3"))
+    yield store
+    store.close()
+
+
+def ids(items):
+    return [item["id"] for item in items]
+
+
+def test_newer_items_are_merged_ahead_of_stored_ones(store):
+    assert store.merge("Alice", "posts", [{"id": "t3_b"}, {"id": "t3_a"}]) == 2
+    assert store.merge("alice", "posts", [{"id": "t3_d"}, {"id": "t3_c"}, {"id": "t3_b"}]) == 2
+
+    assert ids(store.items("alice", "posts")) == ["t3_d", "t3_c", "t3_b", "t3_a"]
+    assert ids(store.items("ALICE", "posts", limit=2)) == ["t3_d", "t3_c"]
+
+
+def test_older_items_are_merged_behind_stored_ones(store):
+    store.merge("alice", "comments", [{"id": "t1_c"}, {"id": "t1_b"}])
+    store.merge("alice", "comments", [{"id": "t1_a"}, {"id": "t1_0"}], older=True)
+
+    assert ids(store.items("alice", "comments")) == ["t1_c", "t1_b", "t1_a", "t1_0"]
+    assert store.oldest_id("alice", "comments") == "t1_0"
+
+
+def test_oldest_id_ignores_items_without_a_fullname(store):
+    store.merge("alice", "posts", [{"id": "t3_a"}, {"title": "no id"}])
+
+    assert store.oldest_id("alice", "posts") == "t3_a"
+    assert store.oldest_id("bob", "posts") is None
+
+
+def test_known_ids_are_per_user_and_kind(store):
+    store.merge("alice", "posts", [{"id": "t3_a"}])
+    store.merge("alice", "comments", [{"id": "t1_a"}])
+    store.merge("bob", "posts", [{"id": "t3_b"}])
+
+    assert store.known_ids("Alice", "posts") == {"t3_a"}
+    assert store.known_ids("alice", "comments") == {"t1_a"}
+
+
+def test_item_key_falls_back_to_a_content_hash():
+    item = {"title": "t", "content": "c", "id": None}
+
+    assert item_key(item) == item_key({"content": "c", "title": "t"})
+    assert item_key(item).startswith("h_")
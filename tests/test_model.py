@@ -0,0 +1,172 @@
+import json
+
+import pytest
+
+from benchmarks.fake_model import FakeModel, FakeResponse
+from benchmarks.fixture_server import user_history
+from fetchers import HttpFetcher
+from model import FACET_PROMPTS, RedditPersonaAnalyzer
+
+
+class MalformedStructuredModel(FakeModel):
+    """Answers facet prompts normally but every schema-constrained call with broken JSON."""
+
+    def generate_content(self, prompt, generation_config=None, stream=False, **kwargs):
+        if generation_config and generation_config.get("response_schema"):
+            with self._lock:
+                self.calls += 1
+            return FakeResponse('{"goals": ["unfinished"', 0)
+        return super().generate_content(prompt, generation_config, stream, **kwargs)
+
+
+def analyzer_for(username, model, cache, posts=20, comments=30, **kwargs):
+    post_items, comment_items = user_history(username, posts, comments)
+    return RedditPersonaAnalyzer(
+        username,
+        model=model,
+        cache=cache,
+        posts=[HttpFetcher.to_post(item) for item in post_items],
+        comments=[HttpFetcher.to_comment(item) for item in comment_items],
+        **kwargs,
+    )
+
+
+def test_parse_persona_accepts_a_fenced_object():
+    persona = {facet: [f" {facet} finding ", ""] for facet in FACET_PROMPTS}
+    text = "```json\n" + json.dumps(persona) + "\n```"
+
+    assert RedditPersonaAnalyzer._parse_persona(text) == {facet: [f"{facet} finding"] for facet in FACET_PROMPTS}
+
+
+def test_parse_persona_keeps_at_most_ten_findings():
+    persona = {facet: [str(i) for i in range(15)] for facet in FACET_PROMPTS}
+
+    assert RedditPersonaAnalyzer._parse_persona(json.dumps(persona))["goals"] == [str(i) for i in range(10)]
+
+
+@pytest.mark.parametrize("text", [
+    '{"goals": ["unfinished"',
+    "[]",
+    json.dumps({"goals": ["a"]}),
+    json.dumps({facet: "not a list" for facet in FACET_PROMPTS}),
+    "",
+])
+def test_parse_persona_rejects_malformed_responses(text):
+    with pytest.raises(ValueError):
+        RedditPersonaAnalyzer._parse_persona(text)
+
+
+def test_single_call_persona(cache, fake_model):
+    persona = analyzer_for("alice", fake_model, cache).build_persona()
+
+    assert set(persona) == set(FACET_PROMPTS)
+    assert all(persona.values())
+    assert fake_model.calls == 1
+
+
+def test_malformed_structured_response_falls_back_to_facet_prompts(cache):
+    model = MalformedStructuredModel(latency=0)
+
+    persona = analyzer_for("alice", model, cache).build_persona()
+
+    assert set(persona) == set(FACET_PROMPTS)
+    assert all(persona.values())
+    assert persona["fears"][0].endswith("(fears)")
+    # One structured attempt, then one prompt per facet.
+    assert model.calls == 1 + len(FACET_PROMPTS)
+
+
+def test_persona_is_cached(cache, fake_model):
+    first = analyzer_for("alice", fake_model, cache).build_persona()
+    second = analyzer_for("alice", fake_model, cache).build_persona()
+
+    assert first == second
+    assert fake_model.calls == 1
+
+
+def test_reduce_findings_merges_duplicates_and_ranks_recurring_first(cache, fake_model):
+    analyzer = analyzer_for("alice", fake_model, cache)
+    partials = [
+        {"goals": ["Learn Rust", "Run a marathon"], "fears": ["Losing data"]},
+        {"goals": ["run a marathon!", "Buy a house"]},
+        {"goals": ["Run a Marathon"], "fears": ["losing data."]},
+    ]
+
+    persona = analyzer._reduce_findings(partials)
+
+    assert persona["goals"] == ["Run a marathon", "Learn Rust", "Buy a house"]
+    assert persona["fears"] == ["Losing data"]
+    assert persona["interests"] == []
+    # Everything fits in ten findings per facet, so no reduce call was needed.
+    assert fake_model.calls == 0
+
+
+def test_reduce_findings_asks_the_model_when_a_facet_overflows(cache, fake_model):
+    analyzer = analyzer_for("alice", fake_model, cache)
+    partials = [{"goals": [f"Goal {shard}-{i}" for i in range(6)]} for shard in range(2)]
+
+    persona = analyzer._reduce_findings(partials)
+
+    assert fake_model.calls == 1
+    assert set(persona) == set(FACET_PROMPTS)
+
+
+def test_reduce_findings_falls_back_to_local_merge(cache):
+    model = MalformedStructuredModel(latency=0)
+    analyzer = analyzer_for("alice", model, cache)
+    partials = [{"goals": [f"Goal {shard}-{i}" for i in range(6)]} for shard in range(2)]
+
+    persona = analyzer._reduce_findings(partials)
+
+    assert model.calls == 1
+    assert persona["goals"] == [f"Goal {shard}-{i}" for shard in range(2) for i in range(6)][:10]
+
+
+def test_large_history_is_map_reduced_over_the_selection(cache, fake_model):
+    analyzer = analyzer_for("bob", fake_model, cache, posts=250, comments=350, token_budget=1500)
+
+    persona = analyzer.build_persona()
+
+    stats = analyzer.corpus.stats
+    assert stats["items_kept"] < stats["items_selected"] < stats["items_after_dedup"]
+    assert all(persona.values())
+    # Several shard calls, then one reduce call.
+    assert fake_model.calls > 2
+
+
+def test_stream_persona_uses_one_structured_call(cache, fake_model):
+    chunks = list(analyzer_for("alice", fake_model, cache).stream_persona())
+
+    assert [facet for facet, _ in chunks] == list(FACET_PROMPTS)
+    assert all(text for _, text in chunks)
+    assert fake_model.calls == 1
+
+
+class TruncatedStreamModel(FakeModel):
+    """Streams a structured reply that breaks off after the first facet."""
+
+    def generate_content(self, prompt, generation_config=None, stream=False, **kwargs):
+        if stream:
+            with self._lock:
+                self.calls += 1
+            return iter([FakeResponse('{"goals": ["Ship the side project"], ', 0), FakeResponse('"fears": ["', 0)])
+        return super().generate_content(prompt, generation_config, stream, **kwargs)
+
+
+def test_stream_persona_asks_per_facet_only_for_what_was_not_shown(cache):
+    model = TruncatedStreamModel(latency=0)
+
+    chunks = dict(analyzer_for("alice", model, cache).stream_persona())
+
+    assert chunks["goals"] == "Ship the side project"
+    assert set(chunks) == set(FACET_PROMPTS)
+    assert model.calls == 1 + len(FACET_PROMPTS) - 1
+
+
+def test_stream_persona_replays_a_map_reduced_persona(cache, fake_model):
+    analyzer = analyzer_for("bob", fake_model, cache, posts=250, comments=350, token_budget=1500)
+
+    chunks = dict(analyzer.stream_persona())
+
+    assert chunks == {facet: "\n".join(findings) for facet, findings in analyzer.build_persona().items()}
+    assert fake_model.calls > 2
@@ -0,0 +1,137 @@
+import os
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from persona_cache import LRUCache, PersonaCache, SQLiteCache, persona_key
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("persona_cache.time", SimpleNamespace(time=clock.time))
+    return clock
+
+
+@pytest.fixture
+def disk(tmp_path):
+    disk = SQLiteCache(os.path.join(tmp_path, "cache.sqlite3"))
+    yield disk
+    disk.close()
+
+
+def test_lru_evicts_the_least_recently_used_entry():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_entries_expire_after_their_ttl(clock):
+    cache = LRUCache()
+    cache.set("a", 1, ttl=10)
+    clock.now += 9
+    assert cache.get("a") == 1
+    clock.now += 2
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_hit_rate_counts_hits_and_misses():
+    cache = LRUCache()
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("a")
+    cache.get("missing")
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    assert stats["hit_rate"] == pytest.approx(2 / 3)
+
+
+def test_sqlite_entries_expire_after_their_ttl(clock, disk):
+    disk.set("a", {"x": 1}, ttl=10)
+    assert disk.get("a", with_expiry=True) == ({"x": 1}, 1010.0)
+    clock.now += 11
+
+    assert disk.get("a") is None
+    assert disk.stats()["entries"] == 0
+
+
+def test_sqlite_evicts_least_recently_used_entries_over_max_bytes(clock, tmp_path):
+    disk = SQLiteCache(os.path.join(tmp_path, "small.sqlite3"), max_bytes=50)
+    try:
+        disk.set("a", "x" * 20)
+        clock.now += 1
+        disk.set("b", "y" * 20)
+        clock.now += 1
+        disk.get("a")
+        clock.now += 1
+        disk.set("c", "z" * 20)
+
+        assert disk.get("b") is None
+        assert disk.get("a") == "x" * 20
+        assert disk.get("c") == "z" * 20
+        assert disk.stats()["bytes"] <= 50
+        assert disk.stats()["evictions"] == 1
+    finally:
+        disk.close()
+
+
+def test_disk_hits_are_promoted_to_memory_with_their_remaining_ttl(clock, tmp_path):
+    path = os.path.join(tmp_path, "cache.sqlite3")
+    writer = PersonaCache(path)
+    writer.set("k", [1, 2], ttl=100)
+    writer.disk.close()
+
+    reader = PersonaCache(path)
+    try:
+        clock.now += 40
+        assert reader.get("k") == [1, 2]
+        assert reader.memory.stats()["entries"] == 1
+        assert reader.get("k") == [1, 2]
+        assert reader.disk.stats()["hits"] == 1
+        clock.now += 61
+        assert reader.get("k") is None
+    finally:
+        reader.disk.close()
+
+
+def test_persona_key_ignores_json_formatting_but_not_the_prompt_version():
+    posts = [{"title": "t", "id": "t3_a"}]
+    key = persona_key(posts, [], "model", "v1")
+
+    assert persona_key('[{"id": "t3_a",  "title": "t"}]', "", "model", "v1") == key
+    assert persona_key(posts, [], "model", "v2") != key
+
+
+def test_scrape_with_smaller_limits_is_a_miss(cache):
+    cache.set_scrape("alice", [{"id": "t3_a"}], [{"id": "t1_a"}], max_posts=10, max_comments=10)
+
+    assert cache.get_scrape("alice", 20, 10) is None
+    assert cache.get_scrape("alice", 10, 20) is None
+
+
+def test_scrape_with_larger_limits_is_cut_to_the_requested_ones(cache):
+    posts = [{"id": f"t3_{i}"} for i in range(20)]
+    comments = [{"id": f"t1_{i}"} for i in range(30)]
+    # main() hands back JSON strings, the fetchers hand back lists.
+    cache.set_scrape("alice", json.dumps(posts), comments, max_posts=20, max_comments=30)
+
+    assert cache.get_scrape("alice", 5, 7) == (posts[:5], comments[:7])
+    assert cache.get_scrape("Alice", 20, 30) == (json.dumps(posts), comments)
+    assert cache.get_scrape("alice") == (json.dumps(posts), comments)
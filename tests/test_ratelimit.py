@@ -0,0 +1,36 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from batch import init_scrape_worker
+from ratelimit import HostRateLimiter, SharedRateLimiter
+
+
+def reserve_reddit_permits(count):
+    from fetchers import host_limiter
+    return [host_limiter.for_host("www.reddit.com").reserve() for _ in range(count)]
+
+
+def test_installed_limiter_is_used_for_its_host():
+    limiter = SharedRateLimiter(5, burst=2)
+    hosts = HostRateLimiter(rate=1000)
+    hosts.install("www.reddit.com", limiter)
+
+    assert hosts.for_host("www.reddit.com") is limiter
+    assert hosts.for_host("example.com") is not limiter
+
+
+def test_shared_limiter_paces_like_a_local_one():
+    limiter = SharedRateLimiter(10, burst=2)
+
+    assert [limiter.reserve() > 0 for _ in range(3)] == [False, False, True]
+
+
+def test_scrape_workers_share_one_budget():
+    limiter = SharedRateLimiter(1, burst=1)
+    with ProcessPoolExecutor(max_workers=2, initializer=init_scrape_worker,
+                             initargs=({"www.reddit.com": limiter},)) as pool:
+        delays = [delay for batch in pool.map(reserve_reddit_permits, [5, 5]) for delay in batch]
+
+    # Ten permits at 1/s from one bucket: the last waits about nine seconds,
+    # and the parent, drawing from the same bucket, queues behind all of them.
+    assert max(delays) > 8
+    assert limiter.reserve() > 9
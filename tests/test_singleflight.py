@@ -0,0 +1,155 @@
+import time
+import threading
+
+import pytest
+
+from singleflight import JobQueue, SingleFlight
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.005)
+
+
+def run_concurrently(flight, key, fn, callers):
+    """Start a leader blocked in ``fn`` and ``callers - 1`` followers; returns (threads, results)."""
+    results = [None] * callers
+
+    def call(i):
+        try:
+            results[i] = flight.do(key, fn)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    threads[0].start()
+    wait_for(lambda: flight.in_flight(key))
+    for thread in threads[1:]:
+        thread.start()
+    wait_for(lambda: flight.stats()["followers"] == callers - 1)
+    return threads, results
+
+
+def test_concurrent_calls_share_one_run():
+    flight, release, runs = SingleFlight(), threading.Event(), []
+
+    def work(notify):
+        runs.append(1)
+        release.wait(5)
+        return "persona"
+
+    threads, results = run_concurrently(flight, "alice", work, 4)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == ["persona"] * 4
+    assert runs == [1]
+    assert flight.stats() == {"leaders": 1, "followers": 3, "in_flight": 0}
+
+
+def test_followers_get_the_leaders_error():
+    flight, release = SingleFlight(), threading.Event()
+
+    def work(notify):
+        release.wait(5)
+        raise ValueError("scrape failed")
+
+    threads, results = run_concurrently(flight, "alice", work, 3)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_key_is_released_after_the_flight():
+    flight = SingleFlight()
+
+    assert flight.do("alice", lambda notify: 1) == 1
+    assert flight.do("alice", lambda notify: 2) == 2
+    assert not flight.in_flight("alice")
+
+
+def test_progress_reaches_every_listener():
+    flight = SingleFlight()
+    leader_events, follower_events = [], []
+    _, leader = flight.begin("alice", lambda *args: leader_events.append(args))
+    follower_flight, follower = flight.begin("alice", lambda *args: follower_events.append(args))
+
+    follower_flight.notify("posts", 5)
+    flight.end("alice", follower_flight, result="done")
+
+    assert (leader, follower) == (True, False)
+    assert leader_events == follower_events == [("posts", 5)]
+    assert follower_flight.wait(1) == "done"
+
+
+@pytest.fixture
+def blocked_queue():
+    """A one-worker queue whose worker is busy until ``release`` is set."""
+    jobs, release = JobQueue(workers=1), threading.Event()
+    started = threading.Event()
+
+    def blocker():
+        started.set()
+        release.wait(5)
+
+    jobs.submit(blocker)
+    started.wait(5)
+    yield jobs, release
+    release.set()
+
+
+def test_jobs_run_by_priority_then_fifo(blocked_queue):
+    jobs, release = blocked_queue
+    order = []
+    futures = [jobs.submit(order.append, name, priority=priority)
+               for name, priority in [("c", 5), ("a", 1), ("b", 1), ("d", 9)]]
+
+    release.set()
+    for future in futures:
+        future.result(5)
+
+    assert order == ["a", "b", "c", "d"]
+
+
+def test_same_key_returns_the_queued_future(blocked_queue):
+    jobs, release = blocked_queue
+    calls = []
+
+    first = jobs.submit(calls.append, "x", key="alice")
+    second = jobs.submit(calls.append, "y", key="alice")
+    release.set()
+
+    assert first is second
+    first.result(5)
+    assert calls == ["x"]
+
+
+def test_promote_moves_a_queued_job_forward(blocked_queue):
+    jobs, release = blocked_queue
+    order = []
+    low = jobs.submit(order.append, "background", priority=10, key="bob")
+    high = jobs.submit(order.append, "interactive", priority=1)
+
+    assert jobs.promote("bob", 0)
+    assert not jobs.promote("bob", 5)
+    release.set()
+    low.result(5)
+    high.result(5)
+
+    assert order == ["background", "interactive"]
+
+
+def test_job_errors_are_set_on_the_future():
+    jobs = JobQueue(workers=1)
+
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        jobs.submit(fail).result(5)
@@ -0,0 +1,135 @@
+import time
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+
+# One round trip: element count for the first matching selector, page height,
+# number of network resources fetched so far and fetch/XHR requests still in
+# flight. Resource entries only appear once a request finishes, so the first
+# call wraps fetch and XMLHttpRequest to count requests that have started.
+PAGE_STATE_SCRIPT = """
+const selectors = arguments[0] || [];
+if (!window.__rpsPending) {
+    const pending = window.__rpsPending = {count: 0};
+    const settle = () => { pending.count = Math.max(0, pending.count - 1); };
+    const originalFetch = window.fetch;
+    if (originalFetch) {
+        window.fetch = function () {
+            pending.count++;
+            const request = originalFetch.apply(this, arguments);
+            request.then(settle, settle);
+            return request;
+        };
+    }
+    const send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        pending.count++;
+        this.addEventListener('loadend', settle, {once: true});
+        return send.apply(this, arguments);
+    };
+}
+let count = 0;
+for (const selector of selectors) {
+    const n = document.querySelectorAll(selector).length;
+    if (n) { count = n; break; }
+}
+const body = document.body;
+return [
+    document.readyState,
+    count,
+    body ? body.scrollHeight : 0,
+    performance.getEntriesByType('resource').length,
+    window.__rpsPending.count
+];
+"""
+
+
+class AdaptiveWaiter:
+    """
+    Event-driven replacements for fixed ``time.sleep`` calls.
+
+    Every wait polls the page cheaply, returns as soon as its condition holds
+    (or the page has clearly stopped changing) and records how long it took
+    in ``timings`` so the saved latency is visible.
+    """
+
+    def __init__(self, driver, timeout=6, poll=0.1, quiet=2.5):
+        self.driver = driver
+        self.timeout = timeout
+        self.poll = poll
+        self.quiet = quiet
+        self.timings = []
+
+    def page_ready(self, selectors=None, label="page_load", timeout=None):
+        """Wait until the document is interactive and one of ``selectors`` is present."""
+        timeout = self.timeout if timeout is None else timeout
+        selectors = selectors or []
+        started = time.monotonic()
+
+        def ready(driver):
+            state, count, _, _, _ = driver.execute_script(PAGE_STATE_SCRIPT, selectors)
+            return state != "loading" and (count > 0 or not selectors)
+
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=self.poll).until(ready)
+            outcome = "ready"
+        except TimeoutException:
+            outcome = "timeout"
+        return self._record(label, started, outcome) == "ready"
+
+    def count_growth(self, selectors, previous, label="scroll", timeout=None):
+        """
+        Wait until more than ``previous`` elements match ``selectors``.
+
+        Returns True when new elements appeared and False once no fetch/XHR is in
+        flight and the page height and network activity have stayed unchanged for
+        ``quiet`` seconds (the end of the listing), or the timeout expires.
+        ``quiet`` is deliberately generous: ending early truncates the scrape,
+        while waiting longer only costs time on the last scroll.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        last_change = started
+        last_signature = None
+
+        while True:
+            try:
+                _, count, height, resources, pending = self.driver.execute_script(PAGE_STATE_SCRIPT, selectors)
+            except WebDriverException:
+                self._record(label, started, "error")
+                return False
+
+            now = time.monotonic()
+            if count > previous:
+                self._record(label, started, "grew")
+                return True
+
+            signature = (height, resources, pending)
+            if signature != last_signature or pending:
+                last_signature = signature
+                last_change = now
+            elif now - last_change >= self.quiet:
+                self._record(label, started, "end")
+                return False
+
+            if now - started >= timeout:
+                self._record(label, started, "timeout")
+                return False
+
+            time.sleep(self.poll)
+
+    def summary(self):
+        """Aggregate recorded waits per label: count, total and max seconds."""
+        summary = {}
+        for label, elapsed, _ in self.timings:
+            entry = summary.setdefault(label, {"count": 0, "total": 0.0, "max": 0.0})
+            entry["count"] += 1
+            entry["total"] += elapsed
+            entry["max"] = max(entry["max"], elapsed)
+        return summary
+
+    def reset(self):
+        self.timings = []
+
+    def _record(self, label, started, outcome):
+        self.timings.append((label, time.monotonic() - started, outcome))
+        return outcome